@@ -6,7 +6,7 @@ Now: encryption key is shown ONLY in console, NOT auto-pasted.
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import threading
-from client3 import connect_to_server, enter_credentials, confirm_key_and_activate, receive_alerts
+from client3 import connect_to_server, enter_credentials, confirm_key_and_activate, receive_alerts, request_history
 
 class GUIClient(tk.Tk):
     def __init__(self):
@@ -18,6 +18,7 @@ class GUIClient(tk.Tk):
 
         self.client_socket = None
         self.is_connected = False
+        self.credentials = None  # (username, password, key) kept for reconnects after a server restart
 
         self.create_widgets()
         self.configure_tags()
@@ -134,6 +135,7 @@ class GUIClient(tk.Tk):
 
         # success: msg is welcome text (decrypted)
         self.append(msg, "info")
+        self.credentials = (self.entry_username.get().strip(), self.entry_password.get().strip(), key_str)
 
         # disable inputs and enable kill + alerts
         self.entry_username.config(state="disabled")
@@ -147,7 +149,38 @@ class GUIClient(tk.Tk):
         # Display alert generation start
         self.append("Generating alerts and waiting for real-time updates from server...", "info")
 
-        # Start alert listener (encrypted)
+        # Start alert listener (encrypted), then catch up on what happened before we joined
+        threading.Thread(target=receive_alerts, args=(self.client_socket, self), daemon=True).start()
+        request_history(self.client_socket)
+
+    # -------- Server restart: log back in with the same credentials and key --------
+    def schedule_reconnect(self, delay):
+        if not self.credentials or not self.is_connected:
+            return
+        timer = threading.Timer(delay, self._reconnect_thread)
+        timer.daemon = True
+        timer.start()
+
+    def _reconnect_thread(self):
+        if not self.is_connected:
+            return
+        username, password, key_str = self.credentials
+        try:
+            self.client_socket = connect_to_server()
+            success, payload = enter_credentials(self.client_socket, username, password)
+            if success and payload != key_str:
+                success, payload = False, "Server key changed. Please log in again."
+            if success:
+                success, payload = confirm_key_and_activate(self.client_socket, key_str)
+        except Exception as e:
+            success, payload = False, f"Reconnect failed: {e}"
+
+        if not success:
+            self.append(payload, "error")
+            self.kill_connection()
+            return
+
+        self.append(f"Reconnected. {payload}", "info")
         threading.Thread(target=receive_alerts, args=(self.client_socket, self), daemon=True).start()
 
     def kill_connection(self):
@@ -0,0 +1,36 @@
+"""
+Admin CLI: send one command to the server's local admin channel and print the reply.
+
+Examples:
+    python admin_client.py clients
+    python admin_client.py broadcast force
+    python admin_client.py set interval 30
+    python admin_client.py profile 5
+    python admin_client.py help
+"""
+
+import socket
+import sys
+from modules.admin import ADMIN_HOST, ADMIN_PORT, PROFILE_MAX_SECONDS
+
+
+def send_command(command, host=ADMIN_HOST, port=ADMIN_PORT):
+    with socket.create_connection((host, port), timeout=PROFILE_MAX_SECONDS + 10) as sock:
+        sock.sendall((command + "\n").encode())
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return b"".join(chunks).decode()
+
+
+if __name__ == "__main__":
+    command = " ".join(sys.argv[1:]) or "help"
+    try:
+        print(send_command(command), end="")
+    except OSError as e:
+        print(f"❌ Cannot reach admin channel on {ADMIN_HOST}:{ADMIN_PORT}: {e}")
+        sys.exit(1)
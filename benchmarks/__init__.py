@@ -0,0 +1,4 @@
+"""
+CCN Project - Benchmarks
+Standalone measurement scripts, run with python -m benchmarks.<name>
+"""
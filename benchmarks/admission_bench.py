@@ -0,0 +1,65 @@
+"""
+Admission-control benchmark: handshake latency with and without a
+slowloris-style flood of connections that never send USER:.
+
+Spawns `python server.py` (which must not already be running), measures
+login round trips (USER -> AUTH reply), opens FLOOD_SIZE idle sockets and
+measures again while they are held open.
+
+Run from the project root:
+    python -m benchmarks.admission_bench
+"""
+
+import socket
+import statistics
+import time
+from server import HOST, PORT
+from modules.message_handler import send_message, receive_message
+from benchmarks.spawn import running_server
+
+FLOOD_SIZE = 500
+LOGIN_ROUNDS = 50
+STARTUP_WAIT = 1.0
+
+
+def login_latency():
+    """Seconds for one connect + USER + AUTH reply, or None if refused."""
+    start = time.perf_counter()
+    with socket.create_connection((HOST, PORT), timeout=10) as sock:
+        send_message(sock, "USER:bench:bench", use_cipher=False)
+        reply = receive_message(sock, use_cipher=False)
+    if reply not in ("AUTH_SUCCESS", "AUTH_FAIL"):
+        return None
+    return time.perf_counter() - start
+
+
+def report(label, samples):
+    ok = sorted(s for s in samples if s is not None)
+    refused = len(samples) - len(ok)
+    if not ok:
+        print(f"{label:<12} all {refused} logins refused")
+        return
+    p99 = ok[min(len(ok) - 1, int(len(ok) * 0.99))]
+    print(f"{label:<12} p50 {statistics.median(ok) * 1000:6.2f} ms  "
+          f"p99 {p99 * 1000:6.2f} ms  refused {refused}/{len(samples)}")
+
+
+def main():
+    flood = []
+    with running_server():
+        time.sleep(STARTUP_WAIT)
+        report("idle server", [login_latency() for _ in range(LOGIN_ROUNDS)])
+
+        for _ in range(FLOOD_SIZE):
+            try:
+                flood.append(socket.create_connection((HOST, PORT), timeout=10))
+            except OSError:
+                break
+        print(f"flood: {len(flood)} idle connections open")
+        report("under flood", [login_latency() for _ in range(LOGIN_ROUNDS)])
+        for sock in flood:
+            sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Compression benchmark: bytes on the wire and CPU cost per frame
+for each codec, single alerts and batched replay frames.
+
+Run from the project root:
+    python -m benchmarks.compression_bench
+"""
+
+import json
+import random
+import time
+from modules import encryption
+from modules import compression
+
+CONDITIONS = ["Clear", "Clouds", "Rain", "Haze", "Mist", "Thunderstorm"]
+ROUNDS = 2000
+BATCH_SIZE = 20
+
+
+def sample_alert(rng, alert_id):
+    temp = round(rng.uniform(15, 40), 2)
+    humidity = rng.randint(20, 95)
+    priority = "HIGH" if temp > 30 or humidity > 80 else "MEDIUM" if temp > 25 or humidity > 60 else "LOW"
+    alert = {
+        "priority": priority,
+        "message": f"Weather Alert: Temp: {temp}°C, Humidity: {humidity}%, Condition: {rng.choice(CONDITIONS)}",
+        "timestamp": f"2026-10-19 12:{alert_id % 60:02d}:00",
+        "alert_id": 1760870000 + alert_id,
+    }
+    return "ALERT:" + json.dumps(alert)
+
+
+def wire_size(codec, plaintext, batch=False):
+    """Bytes on the wire: 4-byte length prefix + Fernet token."""
+    if codec != compression.CODEC_NONE:
+        plaintext = compression.encode_payload(codec, plaintext, batch=batch)
+    return 4 + len(encryption.encrypt_bytes(plaintext))
+
+
+def cpu_per_frame(codec, payloads, batch=False):
+    """Microseconds spent compressing + decompressing one frame."""
+    start = time.perf_counter()
+    for data in payloads:
+        compression.decode_payload(codec, compression.encode_payload(codec, data, batch=batch))
+    return (time.perf_counter() - start) / len(payloads) * 1e6
+
+
+def main():
+    encryption.init_encryption()
+    rng = random.Random(42)
+    alerts = [sample_alert(rng, i) for i in range(ROUNDS)]
+    singles = [a.encode() for a in alerts]
+    batches = [compression.pack_batch(alerts[i:i + BATCH_SIZE]) for i in range(0, ROUNDS, BATCH_SIZE)]
+
+    codecs = [compression.CODEC_NONE] + compression.available_codecs()
+    base_single = sum(wire_size(compression.CODEC_NONE, d) for d in singles) / len(singles)
+    base_batch = sum(wire_size(compression.CODEC_NONE, d) for d in batches) / len(batches)
+
+    print(f"{'codec':<10} {'alert B':>8} {'saved':>7} {'us/frame':>9} "
+          f"{'batch B':>9} {'saved':>7} {'us/frame':>9}")
+    for codec in codecs:
+        single = sum(wire_size(codec, d) for d in singles) / len(singles)
+        batch = sum(wire_size(codec, d, batch=True) for d in batches) / len(batches)
+        if codec == compression.CODEC_NONE:
+            cpu_single = cpu_batch = 0.0
+        else:
+            cpu_single = cpu_per_frame(codec, singles)
+            cpu_batch = cpu_per_frame(codec, batches, batch=True)
+        print(f"{codec:<10} {single:8.0f} {1 - single / base_single:7.1%} {cpu_single:9.1f} "
+              f"{batch:9.0f} {1 - batch / base_batch:7.1%} {cpu_batch:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Alert history benchmark: memory of a full ring and query latency.
+
+Run from the project root:
+    python -m benchmarks.history_bench
+"""
+
+import random
+import time
+import tracemalloc
+from modules.alert_history import AlertHistory, HISTORY_CAPACITY, HISTORY_PAGE_SIZE, PRIORITIES
+
+ROUNDS = 200
+
+
+def fill(history, count, rng):
+    start = time.time() - count
+    for i in range(count):
+        temp = round(rng.uniform(15, 40), 2)
+        history.append({
+            "priority": rng.choices(PRIORITIES, weights=(6, 3, 1))[0],
+            "message": f"Weather Alert: Temp: {temp}°C, Humidity: {rng.randint(20, 95)}%, Condition: Clouds",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i)),
+            "alert_id": int(start + i),
+        }, at=start + i)
+    return start
+
+
+def timed(label, func):
+    func()
+    began = time.perf_counter()
+    for _ in range(ROUNDS):
+        result = func()
+    per_call = (time.perf_counter() - began) / ROUNDS * 1e6
+    print(f"{label:<40} {per_call:9.1f} us  ({len(result[0])} items)")
+
+
+def main():
+    rng = random.Random(7)
+
+    tracemalloc.start()
+    history = AlertHistory()
+    start = fill(history, HISTORY_CAPACITY * 3, rng)  # wrap around several times
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"full ring: {len(history)} alerts, {current / 1024:.0f} KiB "
+          f"({current / len(history):.0f} B/alert)\n")
+
+    middle = start + HISTORY_CAPACITY * 2.5
+    timed("page, all priorities", lambda: history.query())
+    timed("page, since middle of ring", lambda: history.query(since=middle))
+    timed("page, priority >= HIGH", lambda: history.query(min_priority="HIGH"))
+    timed("page, priority >= MEDIUM since middle", lambda: history.query(since=middle, min_priority="MEDIUM"))
+    timed("full ring in one query", lambda: history.query(limit=HISTORY_CAPACITY))
+    timed("full ring, priority >= MEDIUM", lambda: history.query(min_priority="MEDIUM", limit=HISTORY_CAPACITY))
+
+    def page_through():
+        cursor, total = None, []
+        while True:
+            items, cursor = history.query(after=cursor, limit=HISTORY_PAGE_SIZE)
+            total.extend(items)
+            if cursor is None:
+                return total, None
+    timed(f"full ring in pages of {HISTORY_PAGE_SIZE}", page_through)
+
+
+if __name__ == "__main__":
+    main()
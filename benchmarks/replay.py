@@ -0,0 +1,376 @@
+"""
+Replay a traffic capture (see modules/capture.py) against a running server
+and compare latency/throughput with a stored baseline.
+
+Each captured client session is replayed on its own connection, starting at
+its captured offset: login handshake, then every client -> server frame
+(ACK, HEARTBEAT, ...) at its captured time. Timing is divided by --speed
+(2 = twice as fast, 0 = as fast as possible).
+
+Measured:
+    handshake   connect -> encrypted welcome
+    heartbeat   HEARTBEAT -> HEARTBEAT_OK round trip
+    throughput  replies (HEARTBEAT_OK, HISTORY_END) per second of server busy
+                time, i.e. time with at least one request awaiting its reply.
+                Idle gaps from pacing don't count, so it measures the server
+                rather than the capture's send rate
+
+Latency under load still depends on pacing, so the speed is stored in the
+baseline and runs at a different speed are refused rather than compared.
+
+Without plaintext in the capture, credentials come from --user/--password
+and messages are rebuilt from their verb (ACK -> "ACK:0", see REBUILT).
+
+Run from the project root, with the server already running:
+    python server.py --capture traffic.ccncap              # record
+    python -m benchmarks.replay traffic.ccncap --save-baseline baseline.json
+    python -m benchmarks.replay traffic.ccncap --baseline baseline.json --speed 10
+Exits with status 1 if any metric regressed beyond --tolerance,
+2 if the baseline was recorded at another speed.
+"""
+
+import argparse
+import json
+import socket
+import sys
+import threading
+import time
+from collections import deque
+from modules import capture
+from modules import compression
+from modules import encryption
+from modules.message_handler import send_message, receive_message
+
+DRAIN_WAIT = 2.0  # seconds to wait for outstanding replies before closing
+
+# Messages rebuilt from their verb when the capture has no plaintext
+REBUILT = {"ACK": "ACK:0", "HISTORY": "HISTORY:"}
+
+# Request verb -> verbs of the reply that completes it
+REPLIES = {
+    "HEARTBEAT": ("HEARTBEAT_OK",),
+    "HISTORY": ("HISTORY_END", "HISTORY_ERROR"),
+}
+
+
+# ==================== CAPTURE -> SESSIONS ==================== #
+
+def load_sessions(path):
+    """
+    Group a capture into client sessions.
+
+    Returns:
+        list of (start_s, [(offset_s, verb, plaintext), ...]) where the list holds
+        the client -> server frames of one connection, offsets relative to start_s
+    """
+    by_conn = {}
+    for t_ns, conn_id, direction, flags, wire_size, verb, body in capture.read_capture(path):
+        by_conn.setdefault(conn_id, []).append((t_ns, direction, verb, body))
+
+    sessions = []
+    for records in by_conn.values():
+        # The side that sent USER is the client, whichever end made the capture
+        client_dir = next((d for _, d, verb, _ in records if verb == b"USER"), None)
+        if client_dir is None:
+            continue
+        start_ns = records[0][0]
+        frames = [((t - start_ns) / 1e9, verb.decode(errors="replace"), body.decode(errors="replace"))
+                  for t, d, verb, body in records if d == client_dir]
+        sessions.append((start_ns / 1e9, frames))
+    sessions.sort(key=lambda s: s[0])
+    if sessions:
+        first = sessions[0][0]
+        sessions = [(start - first, frames) for start, frames in sessions]
+    return sessions
+
+
+# ==================== REPLAY ==================== #
+
+class ReplayStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.handshake = []
+        self.heartbeat = []
+        self.frames_sent = 0
+        self.frames_received = 0
+        self.refused = 0
+        self.replies = 0
+        self.busy_s = 0.0
+        self._outstanding = 0
+        self._busy_since = None
+
+    def add(self, name, value):
+        with self.lock:
+            getattr(self, name).append(value)
+
+    def count(self, name, n=1):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def request_sent(self, now):
+        with self.lock:
+            if self._outstanding == 0:
+                self._busy_since = now
+            self._outstanding += 1
+
+    def request_done(self, now, replied=True):
+        """A reply arrived (or, with replied=False, the request was abandoned)."""
+        with self.lock:
+            self._outstanding -= 1
+            if replied:
+                self.replies += 1
+            if self._outstanding == 0:
+                self.busy_s += now - self._busy_since
+
+
+def _wait_until(replay_start, offset, speed):
+    if speed > 0:
+        delay = replay_start + offset / speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _handshake(sock, frames, args):
+    """Log in like client3 does. Returns True once the welcome arrives."""
+    user_msg = next((body for _, verb, body in frames if verb == "USER" and body), None)
+    send_message(sock, user_msg or f"USER:{args.user}:{args.password}", use_cipher=False)
+    if receive_message(sock, use_cipher=False) != "AUTH_SUCCESS":
+        return False
+    key_msg = receive_message(sock, use_cipher=False)
+    if not key_msg or not key_msg.startswith("ENCRYPTION_KEY:"):
+        return False
+    key = key_msg.split(":", 1)[1].encode()
+    if encryption.ENCRYPTION_KEY != key:
+        encryption.set_encryption_key(key)
+
+    confirm = next((body for _, verb, body in frames if verb.startswith("CIPHER_OK") and body), None)
+    confirm = confirm or compression.build_offer()
+    send_message(sock, confirm, use_cipher=False)
+    if compression.parse_offer(confirm):
+        reply = receive_message(sock, use_cipher=False)
+        if not reply or not reply.startswith("COMPRESS_OK:"):
+            return False
+        compression.set_codec(sock, reply.split(":", 1)[1])
+    return receive_message(sock, use_cipher=True) is not None
+
+
+def _reader(sock, awaiting, stats):
+    """Match replies to requests; the server answers one connection in order."""
+    while True:
+        message = receive_message(sock, use_cipher=True)
+        if message is None or message.startswith("SERVER_SHUTDOWN"):
+            return
+        now = time.perf_counter()
+        stats.count("frames_received")
+        if awaiting and message.split(":", 1)[0] in REPLIES[awaiting[0][0]]:
+            verb, sent_at = awaiting.popleft()
+            stats.request_done(now)
+            if verb == "HEARTBEAT":
+                stats.add("heartbeat", now - sent_at)
+
+
+def replay_session(start, frames, replay_start, args, stats):
+    _wait_until(replay_start, start, args.speed)
+    began = time.perf_counter()
+    try:
+        sock = socket.create_connection((args.host, args.port), timeout=30)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        stats.count("refused")
+        return
+    awaiting = deque()  # (request verb, sent_at) for requests with a reply
+    reader = None
+    try:
+        if not _handshake(sock, frames, args):
+            stats.count("refused")
+            return
+        stats.add("handshake", time.perf_counter() - began)
+
+        reader = threading.Thread(target=_reader, args=(sock, awaiting, stats), daemon=True)
+        reader.start()
+        for offset, verb, body in frames:
+            if verb == "USER" or verb.startswith("CIPHER_OK"):
+                continue
+            _wait_until(replay_start, start + offset, args.speed)
+            message = body or REBUILT.get(verb, verb)
+            if verb in REPLIES:
+                now = time.perf_counter()
+                stats.request_sent(now)
+                awaiting.append((verb, now))
+            if not send_message(sock, message, use_cipher=True):
+                break
+            stats.count("frames_sent")
+
+        deadline = time.perf_counter() + DRAIN_WAIT
+        while awaiting and time.perf_counter() < deadline:
+            time.sleep(0.01)
+    finally:
+        if reader is not None:
+            # close() alone doesn't wake a blocked recv
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            reader.join()
+        sock.close()
+        # Requests that never got a reply still end their busy period
+        now = time.perf_counter()
+        while awaiting:
+            awaiting.popleft()
+            stats.request_done(now, replied=False)
+
+
+def run_replay(sessions, args):
+    stats = ReplayStats()
+    replay_start = time.perf_counter()
+    threads = [threading.Thread(target=replay_session, args=(start, frames, replay_start, args, stats))
+               for start, frames in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - replay_start
+    return stats, elapsed
+
+
+# ==================== RESULTS ==================== #
+
+def histogram(samples):
+    """Power-of-two microsecond buckets: {"<=128us": count, ...}."""
+    buckets = {}
+    for s in samples:
+        us = max(1, int(s * 1e6))
+        bucket = 1 << (us - 1).bit_length()
+        buckets[bucket] = buckets.get(bucket, 0) + 1
+    return {f"<={b}us": buckets[b] for b in sorted(buckets)}
+
+
+def summarize(samples):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+    return {
+        "count": len(ordered),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "histogram": histogram(ordered),
+    }
+
+
+def build_result(stats, elapsed, speed):
+    return {
+        "speed": speed,
+        "handshake": summarize(stats.handshake),
+        "heartbeat": summarize(stats.heartbeat),
+        "frames_sent": stats.frames_sent,
+        "frames_received": stats.frames_received,
+        "refused": stats.refused,
+        "elapsed_s": elapsed,
+        "replies": stats.replies,
+        "busy_s": stats.busy_s,
+        "throughput_rps": stats.replies / stats.busy_s if stats.busy_s > 0 else 0.0,
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Print a comparison table; return the list of regressed metric names."""
+    regressions = []
+    print(f"{'metric':<22} {'baseline':>10} {'current':>10} {'change':>8}")
+    for section in ("handshake", "heartbeat"):
+        for key in ("p50_ms", "p99_ms"):
+            base = (baseline.get(section) or {}).get(key)
+            cur = (result.get(section) or {}).get(key)
+            if base is None or cur is None:
+                continue
+            change = cur / base - 1 if base else 0.0
+            flag = " REGRESSED" if change > tolerance else ""
+            print(f"{section + ' ' + key:<22} {base:10.3f} {cur:10.3f} {change:+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{section}.{key}")
+    base, cur = baseline.get("throughput_rps", 0.0), result["throughput_rps"]
+    change = cur / base - 1 if base and cur else 0.0
+    flag = " REGRESSED" if change < -tolerance else ""
+    print(f"{'throughput_rps':<22} {base:10.1f} {cur:10.1f} {change:+8.1%}{flag}")
+    if flag:
+        regressions.append("throughput_rps")
+    if result["refused"] > baseline.get("refused", 0):
+        print(f"refused sessions: {baseline.get('refused', 0)} -> {result['refused']} REGRESSED")
+        regressions.append("refused")
+    return regressions
+
+
+def print_result(result):
+    for section in ("handshake", "heartbeat"):
+        summary = result[section]
+        if summary is None:
+            print(f"{section:<10} no samples")
+            continue
+        print(f"{section:<10} n={summary['count']:<5} p50 {summary['p50_ms']:.3f} ms  "
+              f"p90 {summary['p90_ms']:.3f} ms  p99 {summary['p99_ms']:.3f} ms  "
+              f"max {summary['max_ms']:.3f} ms")
+        for bucket, count in summary["histogram"].items():
+            print(f"    {bucket:>12} {count}")
+    print(f"throughput {result['throughput_rps']:.1f} replies/s of busy time "
+          f"({result['replies']} replies in {result['busy_s'] * 1000:.1f} ms busy)")
+    print(f"frames     {result['frames_sent']} sent, {result['frames_received']} received, "
+          f"{result['refused']} sessions refused, {result['elapsed_s']:.2f} s")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay a CCN traffic capture against a server")
+    parser.add_argument("capture", help="capture file written by server.py --capture")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale, 0 = as fast as possible")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write this run's results as a baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sessions = load_sessions(args.capture)
+    if not sessions:
+        print(f"No client sessions found in {args.capture}")
+        return 1
+    print(f"Replaying {len(sessions)} session(s) at "
+          f"{'max' if args.speed <= 0 else f'{args.speed:g}x'} speed")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("speed") != args.speed:
+            print(f"Baseline {args.baseline} was recorded at speed {baseline.get('speed')}, "
+                  f"not {args.speed:g}; rerun with that --speed or save a new baseline")
+            return 2
+
+    stats, elapsed = run_replay(sessions, args)
+    result = build_result(stats, elapsed, args.speed)
+    print_result(result)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+        print("No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
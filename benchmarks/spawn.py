@@ -0,0 +1,28 @@
+"""
+Helper for benchmarks that need a live server process.
+The server runs in a throwaway working directory, so its server_log.txt
+never lands in the source tree.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import contextmanager
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+
+@contextmanager
+def running_server(*args):
+    """Start `python server.py *args` in a temp dir; terminate it on exit."""
+    with tempfile.TemporaryDirectory(prefix="ccn-bench-") as workdir:
+        process = subprocess.Popen(
+            [sys.executable, SERVER_SCRIPT, *args], cwd=workdir,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            yield process
+        finally:
+            process.terminate()
+            process.wait()
@@ -0,0 +1,89 @@
+"""
+Startup benchmark for the server and client entry points.
+
+1. Import cost: runs each entry module under `python -X importtime`
+   and lists the most expensive imports (cumulative microseconds).
+2. Time to first accepted connection: spawns `python server.py`, connects
+   as soon as the port opens and waits for the server's AUTH reply.
+   The server must not already be running on its port.
+
+Run from the project root:
+    python -m benchmarks.startup_bench
+"""
+
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from server import HOST, PORT
+from modules.message_handler import send_message, receive_message
+from benchmarks.spawn import running_server
+
+ENTRY_MODULES = ["server", "client3"]
+TOP_IMPORTS = 8
+SPAWN_ROUNDS = 5
+SPAWN_TIMEOUT = 10.0
+
+
+def _importtime(code):
+    """[(cumulative_us, name), ...] from `python -X importtime -c code`."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    return rows
+
+
+def import_report(module):
+    """
+    Return (total_us, [(cumulative_us, name), ...]) for importing module.
+    Imports done by interpreter startup (site, .pth hooks) are left out.
+    """
+    startup = {name.strip() for _, name in _importtime("pass")}
+    rows = [row for row in _importtime(f"import {module}") if row[1].strip() not in startup]
+    total = next(cum for cum, name in rows if name.strip() == module)
+    rows.sort(reverse=True)
+    return total, rows[1:TOP_IMPORTS + 1]
+
+
+def time_to_first_accept():
+    """Seconds from spawning server.py until it answers a login attempt."""
+    start = time.perf_counter()
+    with running_server():
+        while time.perf_counter() - start < SPAWN_TIMEOUT:
+            try:
+                sock = socket.create_connection((HOST, PORT), timeout=SPAWN_TIMEOUT)
+            except OSError:
+                time.sleep(0.001)
+                continue
+            with sock:
+                send_message(sock, "USER:bench:bench", use_cipher=False)
+                if receive_message(sock, use_cipher=False) is None:
+                    raise RuntimeError("server closed the connection without replying")
+            return time.perf_counter() - start
+        raise RuntimeError(f"server did not accept within {SPAWN_TIMEOUT}s")
+
+
+def main():
+    for module in ENTRY_MODULES:
+        total, top = import_report(module)
+        print(f"import {module}: {total / 1000:.1f} ms")
+        for cumulative, name in top:
+            print(f"  {cumulative / 1000:8.1f} ms {name}")
+        print()
+
+    samples = [time_to_first_accept() for _ in range(SPAWN_ROUNDS)]
+    print(f"time to first accepted connection ({SPAWN_ROUNDS} runs): "
+          f"median {statistics.median(samples) * 1000:.0f} ms, "
+          f"min {min(samples) * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,20 +4,23 @@ Client backend: two-step login flow to match GUI
    -> waits for AUTH_SUCCESS and then plain ENCRYPTION_KEY:<key>
    -> returns (success, msg_or_key)
 2) confirm_key(): user provides key; client sets cipher and sends "CIPHER_OK" (plain)
+   with a compression offer, reads plain COMPRESS_OK:<codec>
    -> then expects encrypted welcome and starts receiving alerts
 """
 
 import socket
 import json
+import time
 from modules import encryption as _encryption
+from modules import compression
 from modules.message_handler import send_message, receive_message
-from CLIENT.modules_gui import gui_client
 
 HOST = '127.0.0.1'
 PORT = 8888
 
 def connect_to_server(host=HOST, port=PORT):
     s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     s.connect((host, port))
     return s
 
@@ -31,6 +34,8 @@ def enter_credentials(client_socket, username, password):
     try:
         send_message(client_socket, f"USER:{username}:{password}", use_cipher=False)
         resp = receive_message(client_socket, use_cipher=False)
+        if resp in ("SERVER_FULL", "SERVER_BUSY"):
+            return False, "Server is full. Please try again later."
         if resp != "AUTH_SUCCESS":
             return False, "Authentication failed. Check username/password."
 
@@ -57,8 +62,12 @@ def confirm_key_and_activate(client_socket, key_str):
         if not _encryption.set_encryption_key(key_bytes):
             return False, "Invalid key format locally."
 
-        # Let server know we set the cipher
-        send_message(client_socket, "CIPHER_OK", use_cipher=False)
+        # Let server know we set the cipher, offering payload compression
+        send_message(client_socket, compression.build_offer(), use_cipher=False)
+        reply = receive_message(client_socket, use_cipher=False)
+        if not reply or not reply.startswith("COMPRESS_OK:"):
+            return False, "Server did not answer compression offer."
+        compression.set_codec(client_socket, reply.split(":", 1)[1])
 
         # Now receive an encrypted welcome (use_cipher=True)
         welcome = receive_message(client_socket, use_cipher=True)
@@ -69,6 +78,16 @@ def confirm_key_and_activate(client_socket, key_str):
     except Exception as e:
         return False, f"confirm_key error: {e}"
 
+def request_history(client_socket, seconds=3600, min_priority="LOW", limit=None):
+    """
+    Ask the server for alerts from the last `seconds`. Items arrive in
+    receive_alerts as HISTORY_ITEM messages, followed by HISTORY_END.
+    """
+    request = f"HISTORY:since={time.time() - seconds:.0f};priority={min_priority}"
+    if limit:
+        request += f";limit={limit}"
+    return send_message(client_socket, request, use_cipher=True)
+
 def handle_alert(alert_data):
     try:
         alert = json.loads(alert_data)
@@ -77,6 +96,17 @@ def handle_alert(alert_data):
     except Exception as e:
         return None, "ERROR", f"Error processing alert: {e}"
 
+def parse_reconnect_hint(message):
+    """
+    "SERVER_SHUTDOWN:RECONNECT=<seconds>" -> seconds (float)
+    Plain "SERVER_SHUTDOWN" (no restart coming) -> None
+    """
+    _, _, hint = message.partition(":RECONNECT=")
+    try:
+        return float(hint) if hint else None
+    except ValueError:
+        return None
+
 def receive_alerts(client_socket, gui_console):
     """
     Loop to receive (encrypted) alerts and display to gui_console via gui_console.append(msg, tag)
@@ -86,10 +116,25 @@ def receive_alerts(client_socket, gui_console):
         if not message:
             gui_console.append("Connection lost!", "error")
             break
-        if message == "SERVER_SHUTDOWN":
-            gui_console.append("Server shutting down.", "info")
+        if message.startswith("SERVER_SHUTDOWN"):
+            delay = parse_reconnect_hint(message)
+            if delay is None:
+                gui_console.append("Server shutting down.", "info")
+            else:
+                gui_console.append(f"Server restarting. Reconnecting in {delay:.1f}s...", "info")
+                if hasattr(gui_console, "schedule_reconnect"):
+                    gui_console.schedule_reconnect(delay)
             break
-        if message.startswith("ALERT:"):
+        if message.startswith("HISTORY_ITEM:"):
+            _, priority, alert_msg = handle_alert(message.split(":", 1)[1])
+            gui_console.append(f"[history] {alert_msg}", priority.lower())
+        elif message.startswith("HISTORY_END:"):
+            _, count, cursor = message.split(":", 2)
+            more = " (more available)" if cursor else ""
+            gui_console.append(f"{count} alert(s) of history shown above{more}.", "info")
+        elif message.startswith("HISTORY_ERROR:"):
+            gui_console.append(f"History request failed: {message.split(':', 1)[1]}", "error")
+        elif message.startswith("ALERT:"):
             alert_id, priority, alert_msg = handle_alert(message.split(":", 1)[1])
             tag = "high" if priority.upper() == "HIGH" else "medium" if priority.upper() == "MEDIUM" else "low"
             gui_console.append(alert_msg, tag)
@@ -98,11 +143,20 @@ def receive_alerts(client_socket, gui_console):
         else:
             gui_console.append(f"Server: {message}", "info")
 
+def init_client():
+    """
+    Explicit init phase for the GUI entry point.
+    tkinter is only imported here, so headless users of this module
+    (scripts, benchmarks, tests) never pay for it.
+    """
+    from CLIENT.modules_gui import gui_client
+    return gui_client
+
 # ----------------- Launcher ----------------- #
 if __name__ == "__main__":
     print("🚀 Launching Client GUI...")
     try:
-        gui_client. run_gui()
+        init_client().run_gui()
     except Exception as e:
         print(f"❌ Failed to open GUI: {e}")
 
@@ -5,12 +5,21 @@ Receives "ACK" messages from clients confirming alert delivery.
 
 from modules.logger import log_event
 from modules.message_handler import send_message, receive_message
+from modules.alert_history import stream_history
 
-def handle_client_acknowledgment(client_socket, username, address, active_clients, lock, server_running):
+def handle_client_acknowledgment(record, active_clients, server_running, history):
     """
     Handle acknowledgment messages from client.
+
+    Args:
+        record: ClientRecord of the connected client
+        active_clients: ClientRegistry the client is removed from on disconnect
+        server_running: threading.Event, cleared on shutdown
+        history: AlertHistory answering HISTORY requests
     """
-    while server_running:
+    client_socket = record.sock
+    username = record.username
+    while server_running.is_set():
         try:
             # After login, communications are encrypted
             message = receive_message(client_socket, use_cipher=True)
@@ -19,9 +28,13 @@ def handle_client_acknowledgment(client_socket, username, address, active_client
 
             if message.startswith("ACK:"):
                 alert_id = message.split(":", 1)[1]
+                record.acks_received += 1
                 log_event("ACK", f"Received ACK from {username} for alert {alert_id}")
+            elif message.startswith("HISTORY:"):
+                stream_history(record, history, message)
             elif message == "HEARTBEAT":
-                send_message(client_socket, "HEARTBEAT_OK", use_cipher=True)
+                with record.send_lock:
+                    send_message(client_socket, "HEARTBEAT_OK", use_cipher=True)
             else:
                 log_event("MESSAGE", f"Received from {username}: {message}")
 
@@ -29,8 +42,13 @@ def handle_client_acknowledgment(client_socket, username, address, active_client
             log_event("ERROR", f"Error handling client {username}: {e}")
             break
 
-    # Client disconnected
-    with lock:
-        if username in active_clients:
-            del active_clients[username]
-    log_event("DISCONNECT", f"Client {username} ({address}) disconnected")
+    # Server stopping: leave the client registered so shutdown_server can
+    # still send it SERVER_SHUTDOWN (and a reconnect hint) before closing
+    if not server_running.is_set():
+        return
+
+    # Client disconnected. The broadcaster may already have removed the
+    # record after a failed send, but closing the socket is always ours to do
+    active_clients.remove(record)
+    client_socket.close()
+    log_event("DISCONNECT", f"Client {username} ({record.client_id}) disconnected")
@@ -0,0 +1,295 @@
+"""
+Admin control channel: live introspection and runtime tuning.
+
+A loopback-only TCP listener (default 127.0.0.1:8889) that takes one text
+command per connection and replies in plain text, so `nc` works as well as
+admin_client.py. Commands only read lock-free snapshots (ClientRegistry.snapshot,
+plain counters) or flip flags on ServerControl; they never take a client's
+send_lock, so using them during an incident cannot stall broadcasts.
+
+Commands:
+    help                      list commands
+    clients                   connected clients with send/ACK stats
+    stats                     totals, admission and runtime settings
+    broadcast force|pause|resume
+    set interval <seconds>    alert interval
+    set loglevel <level>      DEBUG, INFO, WARNING or ERROR
+    set <limit> <value>       max_sessions, max_pending, auth_timeout, confirm_timeout
+    stacks                    stack of every thread
+    profile <seconds>         sample all threads and report hot spots
+"""
+
+import math
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from modules import logger
+from modules.logger import log_event
+
+ADMIN_HOST = '127.0.0.1'
+ADMIN_PORT = 8889
+BIND_RETRY_SECONDS = 10.0   # a hot-restarted server waits for its predecessor's port
+PROFILE_INTERVAL = 0.005    # seconds between samples
+PROFILE_MAX_SECONDS = 60
+PROFILE_TOP = 15
+
+
+def _positive_seconds(value):
+    seconds = float(value)
+    if not (math.isfinite(seconds) and seconds > 0):
+        raise ValueError(f"must be a positive number of seconds, got {value}")
+    return seconds
+
+
+def _at_least_one(value):
+    count = int(value)
+    if count < 1:
+        raise ValueError(f"must be at least 1, got {value}")
+    return count
+
+
+# Setting name -> parser that returns the validated value or raises ValueError
+ADMISSION_LIMITS = {
+    "max_sessions": _at_least_one,
+    "max_pending": _at_least_one,
+    "auth_timeout": _positive_seconds,
+    "confirm_timeout": _positive_seconds,
+}
+
+
+class ServerControl:
+    """
+    Runtime knobs shared by the alert thread and the admin channel.
+    Changes wake the alert thread immediately instead of after the old interval.
+    """
+
+    def __init__(self, alert_interval):
+        self.alert_interval = alert_interval
+        self.broadcasts_paused = False
+        self._wake = threading.Event()
+        self._force = False
+
+    def wait_for_next_alert(self, server_running):
+        """
+        Block until the next alert is due. Returns True to generate one now,
+        False if the server stopped or broadcasts are paused.
+        """
+        started = time.monotonic()
+        while server_running.is_set():
+            remaining = started + self.alert_interval - time.monotonic()
+            if not self._wake.wait(max(remaining, 0)):
+                return not self.broadcasts_paused
+            self._wake.clear()
+            if self._force:
+                self._force = False
+                return True
+        return False
+
+    def force_broadcast(self):
+        self._force = True
+        self._wake.set()
+
+    def set_alert_interval(self, seconds):
+        self.alert_interval = seconds
+        self._wake.set()
+
+
+class AdminServer:
+    """
+    Example:
+        admin = AdminServer(active_clients, admission, control)
+        admin.start()
+        ...
+        admin.close()
+    """
+
+    def __init__(self, active_clients, admission, control, host=ADMIN_HOST, port=ADMIN_PORT):
+        self.active_clients = active_clients
+        self.admission = admission
+        self.control = control
+        self.host = host
+        self.port = port
+        self._socket = None
+        self._closed = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._serve, name="admin", daemon=True).start()
+
+    def close(self):
+        self._closed.set()
+        if self._socket:
+            try:
+                self._socket.close()
+            except OSError:
+                pass
+
+    def _bind(self):
+        deadline = time.monotonic() + BIND_RETRY_SECONDS
+        while not self._closed.is_set():
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                sock.bind((self.host, self.port))
+                sock.listen(4)
+                sock.settimeout(1.0)
+                return sock
+            except OSError as e:
+                sock.close()
+                if time.monotonic() > deadline:
+                    log_event("ERROR", f"Admin channel disabled, cannot bind {self.host}:{self.port}: {e}")
+                    return None
+                time.sleep(0.5)
+        return None
+
+    def _serve(self):
+        self._socket = self._bind()
+        if self._socket is None:
+            return
+        log_event("SERVER", f"Admin channel on {self.host}:{self.port}")
+        while not self._closed.is_set():
+            try:
+                conn, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(conn,), name="admin-cmd", daemon=True).start()
+
+    def _handle(self, conn):
+        with conn:
+            try:
+                conn.settimeout(10)
+                line = conn.makefile("r", encoding="utf-8").readline().strip()
+                conn.settimeout(None)
+                reply = self.execute(line)
+            except Exception as e:
+                reply = f"ERROR {e}"
+            try:
+                conn.sendall((reply.rstrip("\n") + "\n").encode())
+            except OSError:
+                pass
+
+    # ==================== COMMANDS ==================== #
+
+    def execute(self, line):
+        """Run one command line and return the reply text."""
+        parts = line.split()
+        if not parts:
+            return "ERROR empty command (try: help)"
+        command, args = parts[0].lower(), parts[1:]
+        handler = getattr(self, f"cmd_{command}", None)
+        if handler is None:
+            return f"ERROR unknown command: {command} (try: help)"
+        log_event("ADMIN", f"Command: {line}")
+        return handler(args)
+
+    def cmd_help(self, args):
+        return __doc__.split("Commands:", 1)[1].strip("\n")
+
+    def cmd_clients(self, args):
+        records = self.active_clients.snapshot()
+        now = time.time()
+        lines = [f"{'username':<12} {'client_id':<22} {'connected':>10} {'sent':>6} {'acked':>6}"]
+        for r in sorted(records, key=lambda r: r.connected_at):
+            lines.append(f"{r.username:<12} {r.client_id:<22} {now - r.connected_at:9.0f}s "
+                         f"{r.alerts_sent:>6} {r.acks_received:>6}")
+        lines.append(f"{len(records)} client(s)")
+        return "\n".join(lines)
+
+    def cmd_stats(self, args):
+        records = self.active_clients.snapshot()
+        a, c = self.admission, self.control
+        return "\n".join([
+            f"clients: {len(records)}",
+            f"alerts_sent: {sum(r.alerts_sent for r in records)}",
+            f"acks_received: {sum(r.acks_received for r in records)}",
+            f"pending_handshakes: {a.pending_count()}",
+            f"rejected: {a.rejected}",
+            f"evicted: {a.evicted}",
+            f"expired: {a.expired}",
+            f"alert_interval: {c.alert_interval}",
+            f"broadcasts_paused: {c.broadcasts_paused}",
+            f"log_level: {logger.get_log_level()}",
+        ] + [f"{name}: {getattr(a, name)}" for name in ADMISSION_LIMITS])
+
+    def cmd_broadcast(self, args):
+        action = args[0].lower() if args else ""
+        if action == "force":
+            self.control.force_broadcast()
+            return "OK alert queued"
+        if action == "pause":
+            self.control.broadcasts_paused = True
+            return "OK broadcasts paused"
+        if action == "resume":
+            self.control.broadcasts_paused = False
+            return "OK broadcasts resumed"
+        return "ERROR usage: broadcast force|pause|resume"
+
+    def cmd_set(self, args):
+        if len(args) != 2:
+            return "ERROR usage: set <name> <value>"
+        name, value = args[0].lower(), args[1]
+        try:
+            if name == "interval":
+                self.control.set_alert_interval(_positive_seconds(value))
+            elif name == "loglevel":
+                logger.set_log_level(value)
+            elif name in ADMISSION_LIMITS:
+                setattr(self.admission, name, ADMISSION_LIMITS[name](value))
+            else:
+                return f"ERROR unknown setting: {name}"
+        except ValueError as e:
+            return f"ERROR {name} {e}"
+        return f"OK {name} = {value}"
+
+    def cmd_stacks(self, args):
+        names = {t.ident: t.name for t in threading.enumerate()}
+        blocks = []
+        for ident, frame in sys._current_frames().items():
+            stack = "".join(traceback.format_stack(frame))
+            blocks.append(f"--- {names.get(ident, '?')} ({ident})\n{stack}")
+        return "\n".join(blocks)
+
+    def cmd_profile(self, args):
+        try:
+            seconds = float(args[0]) if args else 5.0
+        except ValueError:
+            return "ERROR usage: profile <seconds>"
+        seconds = min(max(seconds, PROFILE_INTERVAL), PROFILE_MAX_SECONDS)
+        return sample_profile(seconds)
+
+
+def sample_profile(seconds, interval=PROFILE_INTERVAL, top=PROFILE_TOP):
+    """
+    Statistical profiler: every interval, record what each thread is running.
+    Reports the hottest lines (self) and functions anywhere on the stack (total).
+    """
+    me = threading.get_ident()
+    own = Counter()
+    total = Counter()
+    samples = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            code = frame.f_code
+            own[f"{code.co_filename}:{frame.f_lineno} {code.co_name}"] += 1
+            seen = set()
+            while frame is not None:
+                code = frame.f_code
+                key = f"{code.co_filename}:{code.co_firstlineno} {code.co_name}"
+                if key not in seen:
+                    seen.add(key)
+                    total[key] += 1
+                frame = frame.f_back
+        samples += 1
+        time.sleep(interval)
+
+    lines = [f"{samples} samples over {seconds:g}s", "", "self (line currently running):"]
+    lines += [f"{count:>7} {where}" for where, count in own.most_common(top)]
+    lines += ["", "total (function on stack):"]
+    lines += [f"{count:>7} {where}" for where, count in total.most_common(top)]
+    return "\n".join(lines)
@@ -0,0 +1,141 @@
+"""
+Connection admission control.
+Decides at accept time whether a new connection may start a handshake:
+
+- max_sessions: cap on logged-in clients plus handshakes in progress
+- max_pending: bounded pool of handshakes in progress. When it is full the
+  oldest connection that has not even sent USER: yet is evicted, so a flood
+  of idle (slowloris) sockets cannot starve real clients
+- auth_timeout / confirm_timeout: absolute handshake deadlines, counted from
+  accept (auth) and from AUTH_SUCCESS (confirm). Trickling a byte at a time
+  does not extend them: the accept loop calls reap_expired() on every wakeup
+  and shuts down overdue sockets. Confirming the key is slower because a
+  person has to paste it in the GUI
+- MAX_HANDSHAKE_FRAME: cap on the declared length of a pre-auth frame
+"""
+
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+MAX_SESSIONS = 10
+MAX_PENDING_HANDSHAKES = 32
+AUTH_TIMEOUT = 10.0        # seconds to send USER:username:password
+CONFIRM_TIMEOUT = 120.0    # seconds to paste the key and send CIPHER_OK
+MAX_HANDSHAKE_FRAME = 1024 # bytes; USER: and CIPHER_OK frames are far smaller
+
+# Handshake stages
+STAGE_AUTH = "auth"
+STAGE_CONFIRM = "confirm"
+
+# Plain replies sent to rejected connections
+REJECT_FULL = "SERVER_FULL"
+REJECT_BUSY = "SERVER_BUSY"
+
+
+class AdmissionControl:
+    """
+    Tracks handshakes in progress. All methods are cheap and take one
+    small lock that only the accept loop and handshake threads touch.
+
+    Example:
+        admission = AdmissionControl()
+        reason = admission.admit(client_socket, len(active_clients))
+        if reason:
+            reject(client_socket, reason)
+        ...
+        admission.release(client_socket)
+    """
+
+    def __init__(self, max_sessions=MAX_SESSIONS, max_pending=MAX_PENDING_HANDSHAKES,
+                 auth_timeout=AUTH_TIMEOUT, confirm_timeout=CONFIRM_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending
+        self.auth_timeout = auth_timeout
+        self.confirm_timeout = confirm_timeout
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # sock -> (stage, deadline), oldest first
+        self.rejected = 0
+        self.evicted = 0
+        self.expired = 0
+
+    def admit(self, sock, session_count):
+        """
+        Try to admit a freshly accepted socket.
+
+        Returns:
+            None if admitted, otherwise the reject reply to send
+        """
+        victim = None
+        with self._lock:
+            if session_count >= self.max_sessions:
+                self.rejected += 1
+                return REJECT_FULL
+            pending = len(self._pending)
+            if pending >= self.max_pending or session_count + pending >= self.max_sessions:
+                victim = next((s for s, (stage, _) in self._pending.items() if stage == STAGE_AUTH), None)
+                if victim is None:
+                    self.rejected += 1
+                    return REJECT_BUSY
+                del self._pending[victim]
+                self.evicted += 1
+            self._pending[sock] = (STAGE_AUTH, time.monotonic() + self.auth_timeout)
+
+        if victim is not None:
+            # Wakes the victim's handshake thread; it fails auth and closes
+            try:
+                victim.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        sock.settimeout(self.auth_timeout)
+        return None
+
+    def advance(self, sock):
+        """Authentication passed: move to the key-confirm stage (not evictable)."""
+        with self._lock:
+            if sock in self._pending:
+                self._pending[sock] = (STAGE_CONFIRM, time.monotonic() + self.confirm_timeout)
+        sock.settimeout(self.confirm_timeout)
+
+    def release(self, sock):
+        """Handshake finished (either way): free the pending slot."""
+        with self._lock:
+            self._pending.pop(sock, None)
+
+    def reap_expired(self):
+        """
+        Shut down every handshake past its deadline; returns how many.
+        The shutdown wakes the handshake thread's blocked recv, which then
+        fails and closes the socket. Done under the lock so a socket that
+        was just released (and registered) is never touched.
+        """
+        now = time.monotonic()
+        expired = 0
+        with self._lock:
+            for sock, (_, deadline) in list(self._pending.items()):
+                if deadline > now:
+                    continue
+                del self._pending[sock]
+                expired += 1
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+            self.expired += expired
+        return expired
+
+    def pending_count(self):
+        return len(self._pending)
+
+
+def reject(sock, reason):
+    """Send a plain reject reply without ever blocking the accept loop."""
+    try:
+        sock.settimeout(0)
+        data = reason.encode()
+        sock.send(len(data).to_bytes(4, 'big') + data)
+    except OSError:
+        pass
+    finally:
+        sock.close()
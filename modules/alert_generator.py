@@ -5,7 +5,6 @@ Generates alerts with priority levels (Low, Medium, High) based on environmental
 
 import time
 from datetime import datetime
-import weather_api
 from modules.logger import log_event
 
 
@@ -25,6 +24,9 @@ def generate_alert():
         #     "alert_id": 1234567890
         # }
     """
+    # Imported here: weather_api pulls in requests (~60ms), which only the
+    # alert thread needs, and not until the first alert is due
+    import weather_api
     weather = weather_api.get_current_weather()
     
     # Determine priority based on weather conditions
@@ -0,0 +1,191 @@
+"""
+Alert history: a fixed-size, in-memory ring of recent alerts.
+
+- Memory is capped by capacity, whatever the alert rate: old alerts are
+  overwritten. Times and per-priority sequence numbers live in typed arrays;
+  only the alert JSON strings are Python objects.
+- Time index: insert times never decrease, so "since T" is a binary search.
+- Priority index: one ring of sequence numbers per priority, so
+  "priority >= HIGH" only touches HIGH alerts.
+- Queries are paged: pass the returned cursor as `after` to get the next page.
+
+Protocol (client -> server, encrypted):
+    HISTORY:since=<epoch seconds>;priority=<LOW|MEDIUM|HIGH>;limit=<n>;after=<cursor>
+    (every field optional)
+Server replies with batched frames of "HISTORY_ITEM:<alert json>" and a final
+"HISTORY_END:<count>:<next cursor, empty if done>".
+"""
+
+import heapq
+import json
+import threading
+import time
+from array import array
+from modules.logger import log_event
+from modules.message_handler import send_message, send_batch
+
+HISTORY_CAPACITY = 4096
+HISTORY_PAGE_SIZE = 50      # items per batched frame
+HISTORY_MAX_ITEMS = 500     # items per request unless the client asks for fewer
+
+PRIORITIES = ("LOW", "MEDIUM", "HIGH")
+PRIORITY_CODES = {name: code for code, name in enumerate(PRIORITIES)}
+
+
+class _SeqRing:
+    """Ring of ascending sequence numbers for one priority."""
+    __slots__ = ("seqs", "count")
+
+    def __init__(self, capacity):
+        self.seqs = array('q', bytes(8 * capacity))
+        self.count = 0
+
+    def append(self, seq):
+        self.seqs[self.count % len(self.seqs)] = seq
+        self.count += 1
+
+    def iter_from(self, first_seq):
+        """Yield stored seqs >= first_seq, oldest first."""
+        capacity = len(self.seqs)
+        lo = max(0, self.count - capacity)
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.seqs[mid % capacity] < first_seq:
+                lo = mid + 1
+            else:
+                hi = mid
+        for pos in range(lo, self.count):
+            yield self.seqs[pos % capacity]
+
+
+class AlertHistory:
+    """
+    Example:
+        history = AlertHistory()
+        history.append(alert)
+        items, cursor = history.query(since=time.time() - 3600, min_priority="HIGH")
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._messages = [None] * capacity
+        self._by_priority = [_SeqRing(capacity) for _ in PRIORITIES]
+        self._next_seq = 0
+        self._last_time = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._next_seq, self.capacity)
+
+    def append(self, alert, at=None):
+        """Store an alert dict; returns its sequence number."""
+        code = PRIORITY_CODES.get(str(alert.get("priority", "LOW")).upper(), 0)
+        with self._lock:
+            seq = self._next_seq
+            # Clock steps backwards must not break the time index
+            at = max(time.time() if at is None else at, self._last_time)
+            message = json.dumps(dict(alert, seq=seq, received_at=at))
+            slot = seq % self.capacity
+            self._times[slot] = at
+            self._messages[slot] = message
+            self._by_priority[code].append(seq)
+            self._next_seq = seq + 1
+            self._last_time = at
+        return seq
+
+    def _first_seq_since(self, since, oldest):
+        lo, hi = oldest, self._next_seq
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._times[mid % self.capacity] < since:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def query(self, since=None, min_priority="LOW", after=None, limit=HISTORY_PAGE_SIZE):
+        """
+        Return (items, cursor): up to limit alert JSON strings, oldest first,
+        and the cursor for the next page (None when there is nothing more).
+        """
+        min_code = PRIORITY_CODES[min_priority.upper()]
+        with self._lock:
+            oldest = max(0, self._next_seq - self.capacity)
+            start = oldest
+            if since is not None:
+                start = self._first_seq_since(since, oldest)
+            if after is not None:
+                start = max(start, after)
+
+            if min_code == 0:
+                seqs = range(start, self._next_seq)
+            else:
+                seqs = heapq.merge(*(self._by_priority[code].iter_from(start)
+                                     for code in range(min_code, len(PRIORITIES))))
+
+            items = []
+            last = None
+            for seq in seqs:
+                if len(items) == limit:
+                    return items, last
+                items.append(self._messages[seq % self.capacity])
+                last = seq
+        return items, None
+
+
+def parse_history_request(message):
+    """
+    "HISTORY:since=...;priority=...;limit=...;after=..." -> dict of query args.
+    Raises ValueError on malformed fields.
+    """
+    params = {}
+    _, _, fields = message.partition(":")
+    for field in filter(None, fields.split(";")):
+        key, _, value = field.partition("=")
+        if key == "since":
+            params["since"] = float(value)
+        elif key == "priority":
+            if value.upper() not in PRIORITY_CODES:
+                raise ValueError(f"unknown priority: {value}")
+            params["min_priority"] = value.upper()
+        elif key == "limit":
+            params["limit"] = max(1, min(int(value), HISTORY_MAX_ITEMS))
+        elif key == "after":
+            params["after"] = int(value)
+        else:
+            raise ValueError(f"unknown field: {key}")
+    return params
+
+
+def stream_history(record, history, message):
+    """
+    Answer a HISTORY request on one client's connection. Pages go out as
+    batched frames; the send_lock is held per page only, so live alerts
+    can interleave with a long history stream.
+    """
+    try:
+        params = parse_history_request(message)
+    except ValueError as e:
+        with record.send_lock:
+            send_message(record.sock, f"HISTORY_ERROR:{e}", use_cipher=True)
+        return
+
+    limit = params.pop("limit", HISTORY_MAX_ITEMS)
+    cursor = params.pop("after", None)
+    sent = 0
+    while sent < limit:
+        items, next_cursor = history.query(after=cursor, limit=min(HISTORY_PAGE_SIZE, limit - sent), **params)
+        if items:
+            with record.send_lock:
+                if not send_batch(record.sock, [f"HISTORY_ITEM:{item}" for item in items], use_cipher=True):
+                    return
+            sent += len(items)
+        cursor = next_cursor
+        if cursor is None:
+            break
+
+    with record.send_lock:
+        send_message(record.sock, f"HISTORY_END:{sent}:{'' if cursor is None else cursor}", use_cipher=True)
+    log_event("HISTORY", f"Sent {sent} alert(s) of history to {record.username}")
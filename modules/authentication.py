@@ -7,6 +7,7 @@ sends the encryption key in plain: "ENCRYPTION_KEY:<key_string>"
 
 from modules.logger import log_event
 from modules.message_handler import receive_message, send_message
+from modules.admission import MAX_HANDSHAKE_FRAME
 
 # Predefined username/password dictionary
 USER_DICT = {
@@ -18,15 +19,15 @@ USER_DICT = {
 def authenticate_client(client_socket, address, encryption_key):
     """
     Authenticate client using username/password.
-    Returns True on success. Sends AUTH_SUCCESS/AUTH_FAIL (plain).
+    Returns the username on success, None on failure. Sends AUTH_SUCCESS/AUTH_FAIL (plain).
     """
     try:
         # Read plain message from client
-        msg = receive_message(client_socket, use_cipher=False)
+        msg = receive_message(client_socket, use_cipher=False, max_length=MAX_HANDSHAKE_FRAME)
         if not msg or not msg.startswith("USER:"):
             log_event("AUTH", f"Invalid auth format from {address}: {msg}")
             send_message(client_socket, "AUTH_FAIL", use_cipher=False)
-            return False
+            return None
 
         _, username, password = msg.split(":", 2)
         log_event("AUTH", f"Received login attempt from {address} ({username})")
@@ -34,11 +35,11 @@ def authenticate_client(client_socket, address, encryption_key):
         if username in USER_DICT and USER_DICT[username] == password:
             send_message(client_socket, "AUTH_SUCCESS", use_cipher=False)
             log_event("AUTH", f"Authentication success for {address} ({username})")
-            return True
+            return username
         else:
             send_message(client_socket, "AUTH_FAIL", use_cipher=False)
             log_event("AUTH", f"Authentication failed for {address} ({username})")
-            return False
+            return None
 
     except Exception as e:
         log_event("ERROR", f"Authentication error for {address}: {e}")
@@ -46,4 +47,4 @@ def authenticate_client(client_socket, address, encryption_key):
             send_message(client_socket, "AUTH_FAIL", use_cipher=False)
         except Exception:
             pass
-        return False
+        return None
@@ -4,34 +4,34 @@ Sends each alert simultaneously to all connected clients.
 """
 
 import json
+import socket
 from modules.logger import log_event
 from modules.message_handler import send_message
 
-def broadcast_alert(alert, active_clients, lock):
+def broadcast_alert(alert, active_clients):
     """
     Send alert to all connected clients.
 
     Args:
         alert: Alert dictionary
-        active_clients: Dictionary of active clients {client_id: client_socket}
-        lock: Threading lock for thread-safe operations
+        active_clients: ClientRegistry of connected clients
     """
-    alert_json = json.dumps(alert)
-    disconnected = []
+    message = f"ALERT:{json.dumps(alert)}"
 
-    with lock:
-        for client_id, client_socket in list(active_clients.items()):
+    # Snapshot is lock-free; clients joining mid-broadcast get the next alert
+    for record in active_clients.snapshot():
+        with record.send_lock:
+            # Alerts should be encrypted now
+            sent = send_message(record.sock, message, use_cipher=True)
+        if sent:
+            record.alerts_sent += 1
+            log_event("BROADCAST", f"Alert sent to {record.username} ({record.client_id})")
+        else:
+            log_event("ERROR", f"Failed to send alert to {record.username} ({record.client_id})")
+            if active_clients.remove(record):
+                log_event("DISCONNECT", f"Removed disconnected client: {record.client_id}")
+            # Wake the client's ACK loop, which closes the socket
             try:
-                # Alerts should be encrypted now
-                send_message(client_socket, f"ALERT:{alert_json}", use_cipher=True)
-                log_event("BROADCAST", f"Alert sent to {client_id}")
-            except Exception as e:
-                log_event("ERROR", f"Failed to send alert to {client_id}: {e}")
-                disconnected.append(client_id)
-
-        for client_id in disconnected:
-            try:
-                del active_clients[client_id]
-                log_event("DISCONNECT", f"Removed disconnected client: {client_id}")
-            except KeyError:
+                record.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
                 pass
@@ -0,0 +1,120 @@
+"""
+Traffic capture for replay and performance regression runs.
+When enabled, message_handler records every frame to a compact binary file:
+
+    header:  b"CCNCAP1\\n"
+    record:  RECORD struct (see below) + verb bytes + plaintext bytes
+
+Every record carries the message verb ("ACK", "HEARTBEAT", "USER", ...), which
+is enough to replay the traffic shape. The full plaintext (taken before
+compression and encryption) is only stored with include_plaintext=True, since
+it contains credentials and alert contents.
+
+Usage:
+    capture.start_capture("traffic.ccncap", include_plaintext=False)
+    ...
+    capture.stop_capture()
+"""
+
+import itertools
+import struct
+import threading
+import time
+import weakref
+
+MAGIC = b"CCNCAP1\n"
+
+# t_ns since capture start, connection id, direction, flags,
+# wire size, verb length, plaintext length
+RECORD = struct.Struct("<QIBBIBI")
+
+DIR_SEND = 0
+DIR_RECV = 1
+
+FLAG_CIPHER = 0x01
+FLAG_BATCH = 0x02
+
+MAX_VERB = 32
+
+active = None
+
+
+class TrafficCapture:
+    """Thread-safe writer for one capture file."""
+
+    def __init__(self, path, include_plaintext=False):
+        self.path = path
+        self.include_plaintext = include_plaintext
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter_ns()
+        self._conn_ids = weakref.WeakKeyDictionary()
+        self._next_id = itertools.count(1)
+        self.records = 0
+
+    def _conn_id(self, sock):
+        conn_id = self._conn_ids.get(sock)
+        if conn_id is None:
+            conn_id = self._conn_ids[sock] = next(self._next_id)
+        return conn_id
+
+    def record(self, sock, direction, wire_size, plaintext, use_cipher, batch=False):
+        t_ns = time.perf_counter_ns() - self._start
+        verb = b"BATCH" if batch else message_verb(plaintext)
+        body = plaintext if self.include_plaintext else b""
+        flags = (FLAG_CIPHER if use_cipher else 0) | (FLAG_BATCH if batch else 0)
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(RECORD.pack(t_ns, self._conn_id(sock), direction, flags,
+                                         wire_size, len(verb), len(body)) + verb + body)
+            # Flushed per record so read_capture works while the server runs
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def message_verb(plaintext):
+    """b"ACK:123" -> b"ACK"; batches and odd messages keep at most MAX_VERB bytes."""
+    return plaintext.split(b":", 1)[0][:MAX_VERB]
+
+
+def start_capture(path, include_plaintext=False):
+    """Start recording all framed traffic of this process to path."""
+    global active
+    stop_capture()
+    active = TrafficCapture(path, include_plaintext)
+    return active
+
+
+def stop_capture():
+    global active
+    capture, active = active, None
+    if capture is not None:
+        capture.close()
+
+
+def read_capture(path):
+    """
+    Yield records from a capture file as tuples:
+    (t_ns, conn_id, direction, flags, wire_size, verb, plaintext)
+    plaintext is b"" if the capture was made without it.
+    A record cut short (capture still being written) ends the iteration.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a CCN capture file")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            t_ns, conn_id, direction, flags, wire_size, verb_len, body_len = RECORD.unpack(header)
+            verb = f.read(verb_len)
+            body = f.read(body_len)
+            if len(verb) < verb_len or len(body) < body_len:
+                return
+            yield t_ns, conn_id, direction, flags, wire_size, verb, body
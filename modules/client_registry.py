@@ -0,0 +1,134 @@
+"""
+Client registry: the server's table of connected, logged-in clients.
+Replaces the old global active_clients dict + single lock.
+
+- Lock striping: records are spread over N shards by address, so connection
+  setup, ACK teardown, broadcast and shutdown rarely wait on each other.
+- Copy-on-write snapshots: every shard keeps an immutable tuple of its
+  records, rebuilt on add/remove. snapshot() reads those tuples without
+  taking any lock, so broadcasting never blocks registration.
+- O(1) lookup by address (client_id "ip:port") and by username.
+"""
+
+import threading
+import time
+
+DEFAULT_SHARDS = 8
+
+
+class ClientRecord:
+    """One connected client. __slots__ keeps per-connection memory small."""
+    __slots__ = ("client_id", "username", "address", "sock", "connected_at",
+                 "send_lock", "alerts_sent", "acks_received")
+
+    def __init__(self, sock, address, username):
+        self.sock = sock
+        self.address = address
+        self.username = username
+        self.client_id = f"{address[0]}:{address[1]}"
+        self.connected_at = time.time()
+        # Serializes frames on this socket (broadcast vs. heartbeat replies)
+        self.send_lock = threading.Lock()
+        self.alerts_sent = 0
+        self.acks_received = 0
+
+    def __repr__(self):
+        return f"<ClientRecord {self.username}@{self.client_id}>"
+
+
+class _Shard:
+    __slots__ = ("lock", "records", "snapshot")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = {}
+        self.snapshot = ()
+
+
+class ClientRegistry:
+    """
+    Thread-safe registry of ClientRecords.
+
+    Example:
+        registry = ClientRegistry()
+        record = registry.add(client_socket, address, "admin")
+        for record in registry.snapshot():
+            send_message(record.sock, "hello")
+        registry.remove(record)
+    """
+
+    def __init__(self, shards=DEFAULT_SHARDS):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._user_locks = [threading.Lock() for _ in range(shards)]
+        self._by_username = {}
+
+    def _shard(self, address):
+        return self._shards[hash(address) % len(self._shards)]
+
+    def _user_lock(self, username):
+        return self._user_locks[hash(username) % len(self._user_locks)]
+
+    def add(self, sock, address, username):
+        """Register a client and return its ClientRecord."""
+        record = ClientRecord(sock, address, username)
+        shard = self._shard(address)
+        with shard.lock:
+            shard.records[address] = record
+            shard.snapshot = tuple(shard.records.values())
+        with self._user_lock(username):
+            self._by_username[username] = self._by_username.get(username, ()) + (record,)
+        return record
+
+    def remove(self, record):
+        """Unregister a client. Returns False if it was already gone."""
+        shard = self._shard(record.address)
+        with shard.lock:
+            if shard.records.get(record.address) is not record:
+                return False
+            del shard.records[record.address]
+            shard.snapshot = tuple(shard.records.values())
+        with self._user_lock(record.username):
+            remaining = tuple(r for r in self._by_username.get(record.username, ()) if r is not record)
+            if remaining:
+                self._by_username[record.username] = remaining
+            else:
+                self._by_username.pop(record.username, None)
+        return True
+
+    def get_by_address(self, address):
+        """Record for an (ip, port) address, or None."""
+        return self._shard(address).records.get(address)
+
+    def get_by_username(self, username):
+        """All records logged in as username (a user may have several sessions)."""
+        return self._by_username.get(username, ())
+
+    def snapshot(self):
+        """Lock-free point-in-time list of all records."""
+        records = []
+        for shard in self._shards:
+            records.extend(shard.snapshot)
+        return records
+
+    def clear(self):
+        """Remove every client and return the records that were registered."""
+        removed = []
+        for shard in self._shards:
+            with shard.lock:
+                removed.extend(shard.snapshot)
+                shard.records = {}
+                shard.snapshot = ()
+        for lock in self._user_locks:
+            lock.acquire()
+        try:
+            self._by_username = {}
+        finally:
+            for lock in self._user_locks:
+                lock.release()
+        return removed
+
+    def __len__(self):
+        return sum(len(shard.snapshot) for shard in self._shards)
+
+    def __bool__(self):
+        return any(shard.snapshot for shard in self._shards)
@@ -0,0 +1,243 @@
+"""
+Payload compression for framed messages.
+Runs before encryption (Fernet output is base64 and does not compress).
+The codec is negotiated per connection during the CIPHER_OK handshake:
+    client -> "CIPHER_OK:COMPRESS=zstd-d1,zlib-d1,zlib"   (plain)
+    server -> "COMPRESS_OK:<codec>"                        (plain)
+Clients that send a bare "CIPHER_OK" get no compression.
+Decompression is bounded by MAX_PLAINTEXT_SIZE, so a small malicious frame
+cannot expand into gigabytes; an oversized payload raises ValueError.
+"""
+
+import threading
+import zlib
+import weakref
+from collections import deque
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# Frame flags (first byte of every payload once a codec is negotiated)
+FLAG_COMPRESSED = 0x01
+FLAG_BATCH = 0x02
+
+# Preset dictionary trained on alert traffic. zlib gives the most weight
+# to strings near the end, so the most frequent fragments come last.
+ALERT_DICTIONARY = (
+    b'Server: Welcome ! You are connected to the server.HEARTBEAT_OK'
+    b'Condition: ThunderstormCondition: DrizzleCondition: SnowCondition: Mist'
+    b'Condition: HazeCondition: SmokeCondition: DustCondition: Fog'
+    b'"priority": "LOW", "priority": "MEDIUM", '
+    b'Condition: RainCondition: Clear", "timestamp": "2025-'
+    b'Condition: Clouds", "timestamp": "2026-'
+    b'ALERT:{"priority": "HIGH", "message": "Weather Alert: Temp: '
+    b'\xc2\xb0C, Humidity: %, Condition: '
+    b'", "timestamp": "20:00", "alert_id": 17'
+)
+
+CODEC_NONE = "none"
+CODEC_ZLIB = "zlib"
+CODEC_ZLIB_DICT = "zlib-d1"
+CODEC_ZSTD_DICT = "zstd-d1"
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Payloads shorter than this are sent raw; the header would eat the gain
+MIN_COMPRESS_SIZE = 64
+
+# Largest plaintext a compressed payload may expand to (a full history page
+# is a few KiB, so this is generous)
+MAX_PLAINTEXT_SIZE = 1 << 20
+
+
+def available_codecs():
+    """Codecs this process can use, most preferred first."""
+    codecs = []
+    if zstandard is not None:
+        codecs.append(CODEC_ZSTD_DICT)
+    codecs.extend([CODEC_ZLIB_DICT, CODEC_ZLIB])
+    return codecs
+
+
+def negotiate_codec(offered):
+    """
+    Pick the codec to use from the client's offer.
+    The client's order wins; unknown names are ignored.
+
+    Args:
+        offered: List of codec names sent by the client
+
+    Returns:
+        str: Chosen codec name, or CODEC_NONE
+    """
+    ours = available_codecs()
+    for codec in offered:
+        if codec in ours:
+            return codec
+    return CODEC_NONE
+
+
+def build_offer():
+    """CIPHER_OK message advertising our codecs."""
+    return "CIPHER_OK:COMPRESS=" + ",".join(available_codecs())
+
+
+def parse_offer(message):
+    """
+    Parse a CIPHER_OK message.
+    Returns the offered codec list ([] for a bare CIPHER_OK),
+    or None if the message is not a CIPHER_OK at all.
+    """
+    if message == "CIPHER_OK":
+        return []
+    if message and message.startswith("CIPHER_OK:COMPRESS="):
+        return [c for c in message.split("=", 1)[1].split(",") if c]
+    return None
+
+
+# ==================== PER-SOCKET STATE ==================== #
+
+class _StreamState:
+    """Negotiated codec plus messages unpacked from a batch frame."""
+    __slots__ = ("codec", "pending")
+
+    def __init__(self, codec):
+        self.codec = codec
+        self.pending = deque()
+
+
+_states = weakref.WeakKeyDictionary()
+_states_lock = threading.Lock()
+
+
+def set_codec(sock, codec):
+    """Attach a negotiated codec to a socket (CODEC_NONE detaches it)."""
+    with _states_lock:
+        if codec == CODEC_NONE:
+            _states.pop(sock, None)
+        else:
+            _states[sock] = _StreamState(codec)
+
+
+def get_state(sock):
+    """Return the socket's stream state, or None if nothing was negotiated."""
+    return _states.get(sock)
+
+
+def get_codec(sock):
+    state = _states.get(sock)
+    return state.codec if state else CODEC_NONE
+
+
+# ==================== CODECS ==================== #
+
+_zstd_dict = None
+
+
+def _get_zstd_dict():
+    global _zstd_dict
+    if _zstd_dict is None:
+        _zstd_dict = zstandard.ZstdCompressionDict(
+            ALERT_DICTIONARY, dict_type=zstandard.DICT_TYPE_RAWCONTENT
+        )
+    return _zstd_dict
+
+
+def _compress(codec, data):
+    if codec == CODEC_ZLIB:
+        return zlib.compress(data, ZLIB_LEVEL)
+    if codec == CODEC_ZLIB_DICT:
+        compressor = zlib.compressobj(ZLIB_LEVEL, zdict=ALERT_DICTIONARY)
+        return compressor.compress(data) + compressor.flush()
+    if codec == CODEC_ZSTD_DICT:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=_get_zstd_dict()).compress(data)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+def _zlib_decompress(data, **options):
+    decompressor = zlib.decompressobj(**options)
+    # Ask for one byte more than allowed: getting it means the limit was exceeded
+    plaintext = decompressor.decompress(data, MAX_PLAINTEXT_SIZE + 1)
+    if len(plaintext) > MAX_PLAINTEXT_SIZE:
+        raise ValueError(f"Decompressed payload exceeds {MAX_PLAINTEXT_SIZE} bytes")
+    if not decompressor.eof:
+        raise ValueError("Truncated compressed payload")
+    return plaintext
+
+
+def _decompress(codec, data):
+    if codec == CODEC_ZLIB:
+        return _zlib_decompress(data)
+    if codec == CODEC_ZLIB_DICT:
+        return _zlib_decompress(data, zdict=ALERT_DICTIONARY)
+    if codec == CODEC_ZSTD_DICT:
+        # A declared content size is trusted for allocation, so check it first
+        if zstandard.frame_content_size(data) > MAX_PLAINTEXT_SIZE:
+            raise ValueError(f"Decompressed payload exceeds {MAX_PLAINTEXT_SIZE} bytes")
+        decompressor = zstandard.ZstdDecompressor(dict_data=_get_zstd_dict())
+        return decompressor.decompress(data, max_output_size=MAX_PLAINTEXT_SIZE)
+    raise ValueError(f"Unknown codec: {codec}")
+
+
+# ==================== FRAMING ==================== #
+
+def encode_payload(codec, data, batch=False):
+    """
+    Wrap plaintext bytes in a flagged payload, compressing when it helps.
+
+    Args:
+        codec: Negotiated codec name
+        data: Plaintext bytes
+        batch: True if data is a packed batch (see pack_batch)
+
+    Returns:
+        bytes: flag byte + body
+    """
+    flags = FLAG_BATCH if batch else 0
+    if len(data) >= MIN_COMPRESS_SIZE:
+        compressed = _compress(codec, data)
+        if len(compressed) < len(data):
+            return bytes([flags | FLAG_COMPRESSED]) + compressed
+    return bytes([flags]) + data
+
+
+def decode_payload(codec, payload):
+    """
+    Reverse encode_payload.
+
+    Returns:
+        tuple: (is_batch, plaintext_bytes)
+
+    Raises:
+        ValueError: if the payload is malformed or expands past MAX_PLAINTEXT_SIZE
+    """
+    flags = payload[0]
+    body = payload[1:]
+    if flags & FLAG_COMPRESSED:
+        body = _decompress(codec, body)
+    return bool(flags & FLAG_BATCH), body
+
+
+def pack_batch(messages):
+    """Pack several message strings into one length-prefixed blob."""
+    parts = []
+    for message in messages:
+        data = message.encode()
+        parts.append(len(data).to_bytes(4, 'big'))
+        parts.append(data)
+    return b''.join(parts)
+
+
+def unpack_batch(blob):
+    """Split a blob produced by pack_batch back into message strings."""
+    messages = []
+    offset = 0
+    while offset < len(blob):
+        length = int.from_bytes(blob[offset:offset + 4], 'big')
+        offset += 4
+        messages.append(blob[offset:offset + length].decode())
+        offset += length
+    return messages
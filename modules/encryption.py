@@ -1,36 +1,60 @@
 """
 Encryption utilities using Fernet
+Nothing is generated at import time: the server calls init_encryption()
+(or get_encryption_key()) during startup, the client calls set_encryption_key()
+once the user pastes the key. cryptography itself is imported on first use.
 """
 
-from cryptography.fernet import Fernet
 from modules.logger import log_event
 
-ENCRYPTION_KEY = Fernet.generate_key()
-cipher = Fernet(ENCRYPTION_KEY)
+ENCRYPTION_KEY = None
+cipher = None
+
+def init_encryption(key_bytes=None):
+    """
+    Explicit init phase: use key_bytes, or generate a fresh key.
+    Returns the active key.
+    """
+    from cryptography.fernet import Fernet
+    if key_bytes is None:
+        key_bytes = Fernet.generate_key()
+    if not set_encryption_key(key_bytes):
+        raise ValueError("Invalid encryption key")
+    return ENCRYPTION_KEY
 
 def get_encryption_key():
+    if ENCRYPTION_KEY is None:
+        init_encryption()
     return ENCRYPTION_KEY
 
 def set_encryption_key(key_bytes):
     global ENCRYPTION_KEY, cipher
     try:
-        ENCRYPTION_KEY = key_bytes
+        from cryptography.fernet import Fernet
         cipher = Fernet(key_bytes)
+        ENCRYPTION_KEY = key_bytes
         return True
     except Exception as e:
         log_event("ERROR", f"Failed to set encryption key: {e}")
         return False
 
 def encrypt_message(message):
+    return encrypt_bytes(message.encode())
+
+def decrypt_message(encrypted_data):
+    data = decrypt_bytes(encrypted_data)
+    return data.decode() if data is not None else None
+
+def encrypt_bytes(data):
     try:
-        return cipher.encrypt(message.encode())
+        return cipher.encrypt(data)
     except Exception as e:
         log_event("ERROR", f"Encryption failed: {e}")
         return None
 
-def decrypt_message(encrypted_data):
+def decrypt_bytes(encrypted_data):
     try:
-        return cipher.decrypt(encrypted_data).decode()
+        return cipher.decrypt(encrypted_data)
     except Exception as e:
         log_event("ERROR", f"Decryption failed: {e}")
         return None
@@ -1,11 +1,39 @@
 """
 Module 7: Logging and Monitoring
 Handles logging operations with timestamps.
+Events below the current log level are skipped (change it at runtime
+with set_log_level, e.g. from the admin channel).
 """
 
 from datetime import datetime
 
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+# Level of each event type; anything not listed is INFO.
+# Per-client chatter is DEBUG so it can be silenced under load.
+EVENT_LEVELS = {
+    "ERROR": "ERROR",
+    "BROADCAST": "DEBUG",
+    "ACK": "DEBUG",
+    "MESSAGE": "DEBUG",
+    "HISTORY": "DEBUG",
+}
+
+_log_level = LEVELS["DEBUG"]
+
+def set_log_level(name):
+    global _log_level
+    if name.upper() not in LEVELS:
+        raise ValueError(f"unknown log level: {name} (use {', '.join(LEVELS)})")
+    _log_level = LEVELS[name.upper()]
+
+def get_log_level():
+    return next(name for name, value in LEVELS.items() if value == _log_level)
+
 def log_event(event_type, message):
+    if LEVELS[EVENT_LEVELS.get(event_type, "INFO")] < _log_level:
+        return
+
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     log_message = f"[{timestamp}] [{event_type}] {message}\n"
 
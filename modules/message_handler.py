@@ -1,53 +1,129 @@
 """
 Common message send/receive functions for Client & Server
 Handles optional encryption using modules.encryption
+and optional compression using modules.compression (applied before encryption).
+Every frame is also recorded by modules.capture while a capture is running.
 """
 
 from modules import encryption
+from modules import compression
+from modules import capture
 from modules.logger import log_event
 
+# Cap on encrypted frames: a MAX_PLAINTEXT_SIZE payload plus Fernet's
+# base64 and header overhead fits well within twice the plaintext
+MAX_ENCRYPTED_FRAME = 2 * compression.MAX_PLAINTEXT_SIZE
+
+def _encode(sock, data, use_cipher, batch=False):
+    """Compress (if negotiated) then encrypt plaintext bytes for the wire."""
+    if use_cipher and encryption.ENCRYPTION_KEY:
+        state = compression.get_state(sock)
+        if state is not None:
+            data = compression.encode_payload(state.codec, data, batch=batch)
+        return encryption.encrypt_bytes(data)
+    return data
+
+def _send_frame(sock, data):
+    sock.sendall(len(data).to_bytes(4, 'big') + data)
+
 def send_message(sock, message_str, use_cipher=True):
     try:
-        if use_cipher and encryption.ENCRYPTION_KEY:
-            encrypted = encryption.encrypt_message(message_str)
-            if encrypted is None:
-                return False
-            data = encrypted
-        else:
-            data = message_str.encode()
-
-        length = len(data)
-        sock.sendall(length.to_bytes(4, 'big'))
-        sock.sendall(data)
+        plaintext = message_str.encode()
+        data = _encode(sock, plaintext, use_cipher)
+        if data is None:
+            return False
+        _send_frame(sock, data)
+        recorder = capture.active
+        if recorder is not None:
+            recorder.record(sock, capture.DIR_SEND, 4 + len(data), plaintext, use_cipher)
         return True
     except Exception as e:
         log_event("ERROR", f"send_message error: {e}")
         return False
 
-def receive_message(sock, use_cipher=True):
+def send_batch(sock, messages, use_cipher=True):
+    """
+    Send several messages in one frame (e.g. alert replay after reconnect).
+    Batches are compressed together, so repeated alert text is only paid once.
+    Falls back to one frame per message if no codec was negotiated.
+    """
+    if not messages:
+        return True
+    if not (use_cipher and compression.get_state(sock) is not None):
+        return all(send_message(sock, m, use_cipher) for m in messages)
     try:
-        length_data = b''
-        while len(length_data) < 4:
-            chunk = sock.recv(4 - len(length_data))
-            if not chunk:
-                return None
-            length_data += chunk
+        plaintext = compression.pack_batch(messages)
+        data = _encode(sock, plaintext, use_cipher, batch=True)
+        if data is None:
+            return False
+        _send_frame(sock, data)
+        recorder = capture.active
+        if recorder is not None:
+            recorder.record(sock, capture.DIR_SEND, 4 + len(data), plaintext, use_cipher, batch=True)
+        return True
+    except Exception as e:
+        log_event("ERROR", f"send_batch error: {e}")
+        return False
+
+def _recv_exact(sock, n):
+    data = b''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def receive_message(sock, use_cipher=True, max_length=None):
+    """
+    Receive one message (str), or None on disconnect or error.
+    max_length caps the declared frame length; a larger frame is treated as
+    a protocol error without reading it. Encrypted frames default to
+    MAX_ENCRYPTED_FRAME; handshake reads pass a much smaller cap.
+    A frame that fails to decompress (e.g. a compression bomb) returns None,
+    so callers drop the connection.
+    """
+    if max_length is None and use_cipher:
+        max_length = MAX_ENCRYPTED_FRAME
+    try:
+        state = compression.get_state(sock) if use_cipher else None
+        if state is not None and state.pending:
+            return state.pending.popleft()
+
+        length_data = _recv_exact(sock, 4)
+        if length_data is None:
+            return None
 
         length = int.from_bytes(length_data, 'big')
         if length <= 0:
             return None
+        if max_length is not None and length > max_length:
+            log_event("ERROR", f"receive_message: frame of {length} bytes exceeds {max_length}")
+            return None
 
-        data = b''
-        while len(data) < length:
-            chunk = sock.recv(length - len(data))
-            if not chunk:
-                return None
-            data += chunk
+        data = _recv_exact(sock, length)
+        if data is None:
+            return None
 
+        is_batch = False
         if use_cipher and encryption.ENCRYPTION_KEY:
-            return encryption.decrypt_message(data)
-        else:
-            return data.decode()
+            data = encryption.decrypt_bytes(data)
+            if data is None:
+                return None
+            if state is not None:
+                is_batch, data = compression.decode_payload(state.codec, data)
+
+        recorder = capture.active
+        if recorder is not None:
+            recorder.record(sock, capture.DIR_RECV, 4 + length, data, use_cipher, batch=is_batch)
+
+        if is_batch:
+            messages = compression.unpack_batch(data)
+            if not messages:
+                return None
+            state.pending.extend(messages[1:])
+            return messages[0]
+        return data.decode()
     except Exception as e:
         log_event("ERROR", f"receive_message error: {e}")
         return None
@@ -4,22 +4,46 @@ Authenticate client (plain), send encryption key (plain),
 wait for client's CIPHER_OK (plain), then switch to encrypted comms.
 """
 
+import os
+import selectors
 import threading
 import socket
 from modules.logger import log_event
+from modules import compression
 from modules.authentication import authenticate_client
 from modules.message_handler import send_message, receive_message
 from modules.acknowledgment import handle_client_acknowledgment
+from modules.admission import reject, MAX_HANDSHAKE_FRAME
+from modules.shutdown import LISTEN_FD_ENV
 
-def handle_client_connection(client_socket, address, active_clients, lock, server_running, encryption_key):
+ACCEPT_POLL_INTERVAL = 1.0  # seconds
+ACCEPT_BATCH = 64           # max connections accepted per wakeup
+
+def handle_client_connection(client_socket, address, active_clients, server_running, encryption_key, admission, history):
+    """
+    Run the handshake under admission-control deadlines, then serve ACKs.
+    The pending-handshake slot is held until the client is registered.
+    """
+    try:
+        record = _handshake(client_socket, address, active_clients, server_running, encryption_key, admission)
+    finally:
+        admission.release(client_socket)
+    if record is not None:
+        # ACK loop runs on this thread; no need for a second one per client
+        handle_client_acknowledgment(record, active_clients, server_running, history)
+
+
+def _handshake(client_socket, address, active_clients, server_running, encryption_key, admission):
+    """Returns the registered ClientRecord, or None if the handshake failed."""
     log_event("CONNECTION", f"New connection from {address}")
 
     # Step 1: Authenticate (plain)
-    auth_ok = authenticate_client(client_socket, address, encryption_key)
-    if not auth_ok:
+    username = authenticate_client(client_socket, address, encryption_key)
+    if not username:
         client_socket.close()
         log_event("CONNECTION", f"Connection closed from {address} (auth failed)")
-        return
+        return None
+    admission.advance(client_socket)
 
     # Step 2: Send encryption key (plain), client will paste and send CIPHER_OK after it sets cipher locally
     try:
@@ -28,71 +52,139 @@ def handle_client_connection(client_socket, address, active_clients, lock, serve
     except Exception as e:
         log_event("ERROR", f"Failed to send ENCRYPTION_KEY to {address}: {e}")
         client_socket.close()
-        return
+        return None
 
     # Step 3: Wait for client's confirmation that it set the cipher
+    # (optionally carrying a compression offer, answered with COMPRESS_OK)
     try:
-        confirmation = receive_message(client_socket, use_cipher=False)
-        if confirmation != "CIPHER_OK":
+        confirmation = receive_message(client_socket, use_cipher=False, max_length=MAX_HANDSHAKE_FRAME)
+        offered = compression.parse_offer(confirmation)
+        if offered is None:
             log_event("AUTH", f"Client {address} did not confirm cipher (received: {confirmation})")
             client_socket.close()
-            return
+            return None
+        if offered:
+            codec = compression.negotiate_codec(offered)
+            send_message(client_socket, f"COMPRESS_OK:{codec}", use_cipher=False)
+            compression.set_codec(client_socket, codec)
+            log_event("AUTH", f"Compression for {address}: {codec}")
     except Exception as e:
         log_event("ERROR", f"Error waiting for CIPHER_OK from {address}: {e}")
         client_socket.close()
-        return
-
-    # Step 4: Add to active clients and send encrypted welcome
-    client_id = f"{address[0]}:{address[1]}"
-    with lock:
-        active_clients[client_id] = client_socket
+        return None
+
+    # Step 4: Add to active clients and send encrypted welcome.
+    # Leave admission first so the deadline reaper can't hit a registered client.
+    admission.release(client_socket)
+    client_socket.settimeout(None)
+    record = active_clients.add(client_socket, address, username)
+    client_id = record.client_id
+
+    # Shutdown clears server_running before it empties the registry, so checking
+    # after add() can't miss it: either shutdown took the record (and will notify
+    # the client), or we take it back here
+    if not server_running.is_set():
+        if active_clients.remove(record):
+            client_socket.close()
+            log_event("CONNECTION", f"Refused {username} ({client_id}): server shutting down")
+        return None
 
-    log_event("CONNECTION", f"Client {client_id} added. Total active clients: {len(active_clients)}")
+    log_event("CONNECTION", f"Client {username} ({client_id}) added. Total active clients: {len(active_clients)}")
 
     # Send welcome encrypted (server side encryption module must already be using same key)
     try:
-        send_message(client_socket, f"Welcome {client_id}! You are connected to the server.", use_cipher=True)
+        with record.send_lock:
+            send_message(client_socket, f"Welcome {client_id}! You are connected to the server.", use_cipher=True)
     except Exception as e:
         log_event("ERROR", f"Failed sending encrypted welcome to {client_id}: {e}")
+    return record
+
+
+def create_server_socket(HOST, PORT, LISTEN_BACKLOG):
+    """
+    Create the listening socket, or adopt one inherited from a
+    previous server process during a hot restart (see modules.shutdown).
+    """
+    inherited_fd = os.environ.pop(LISTEN_FD_ENV, None)
+    if inherited_fd is not None:
+        server_socket = socket.socket(fileno=int(inherited_fd))
+        log_event("SERVER", f"Adopted listening socket from previous process on {HOST}:{PORT}")
+    else:
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server_socket.bind((HOST, PORT))
+        server_socket.listen(LISTEN_BACKLOG)
+        log_event("SERVER", f"Server started on {HOST}:{PORT}")
+    # Non-blocking so the accept loop can drain every ready connection per wakeup
+    server_socket.setblocking(False)
+    return server_socket
 
-    # Start ACK listener thread (it will use encrypted receive once cipher is active)
-    ack_thread = threading.Thread(
-        target=handle_client_acknowledgment,
-        args=(client_socket, client_id, address, active_clients, lock, server_running),
-        daemon=True
-    )
-    ack_thread.start()
-    ack_thread.join()
-
-
-def start_server(HOST, PORT, MAX_CLIENTS, active_clients, lock, server_running, alert_generator_func, encryption_key):
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
+def start_server(server_socket, active_clients, server_running, alert_generator_func, encryption_key, admission, history):
+    """
+    Run the accept loop until server_running (a threading.Event) is cleared.
+    Each wakeup accepts up to ACCEPT_BATCH ready connections; admission
+    control rejects or evicts before any handshake thread is started.
+    """
+    selector = selectors.DefaultSelector()
     try:
-        server_socket.bind((HOST, PORT))
-        server_socket.listen(MAX_CLIENTS)
-        log_event("SERVER", f"Server started on {HOST}:{PORT}")
+        selector.register(server_socket, selectors.EVENT_READ)
         log_event("SERVER", "Waiting for clients...")
 
         # Start alert generator
         alert_thread = threading.Thread(target=alert_generator_func, daemon=True)
         alert_thread.start()
 
-        while server_running:
-            try:
-                client_socket, address = server_socket.accept()
-                client_thread = threading.Thread(
-                    target=handle_client_connection,
-                    args=(client_socket, address, active_clients, lock, server_running, encryption_key),
-                    daemon=True
-                )
-                client_thread.start()
-            except Exception as e:
-                if server_running:
-                    log_event("ERROR", f"Error accepting connection: {e}")
+        while server_running.is_set():
+            admission.reap_expired()
+            # Wake up periodically so a cleared server_running stops the loop
+            # and overdue handshakes are reaped
+            if not selector.select(timeout=ACCEPT_POLL_INTERVAL):
+                continue
+            for _ in range(ACCEPT_BATCH):
+                # After a hot-restart handoff the new process does the accepting
+                if not server_running.is_set():
+                    break
+                try:
+                    client_socket, address = server_socket.accept()
+                except (BlockingIOError, InterruptedError):
+                    break
+                except Exception as e:
+                    if server_running.is_set():
+                        log_event("ERROR", f"Error accepting connection: {e}")
+                    break
+                try:
+                    _admit(client_socket, address, active_clients, server_running, encryption_key, admission, history)
+                except Exception as e:
+                    # One bad socket must not end the accept loop
+                    log_event("ERROR", f"Error admitting {address}: {e}")
+                    admission.release(client_socket)
+                    client_socket.close()
 
     except Exception as e:
         log_event("ERROR", f"Server error: {e}")
+    finally:
+        try:
+            selector.unregister(server_socket)
+        except (KeyError, ValueError):
+            pass
+        selector.close()
 
     return server_socket
+
+
+def _admit(client_socket, address, active_clients, server_running, encryption_key, admission, history):
+    client_socket.setblocking(True)
+    # Handshake replies are small back-to-back frames; don't let Nagle hold them
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    reason = admission.admit(client_socket, len(active_clients))
+    if reason:
+        reject(client_socket, reason)
+        log_event("CONNECTION", f"Rejected {address}: {reason}")
+        return
+    client_thread = threading.Thread(
+        target=handle_client_connection,
+        args=(client_socket, address, active_clients, server_running, encryption_key, admission, history),
+        daemon=True
+    )
+    client_thread.start()
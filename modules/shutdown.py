@@ -1,42 +1,104 @@
 """
 Module 8: Graceful Shutdown & Exception Handling
 Safely closes sockets and stops threads on server exit.
+Supports a drain mode (flush in-flight sends, tell clients when to reconnect)
+and a hot restart that hands the listening socket to a new server process.
 """
 
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from modules import capture
 from modules.logger import log_event
 from modules.message_handler import send_message
 
+# Environment variables used to hand state to the replacement process
+LISTEN_FD_ENV = "CCN_LISTEN_FD"
+ENCRYPTION_KEY_ENV = "CCN_ENCRYPTION_KEY"
 
-def shutdown_server(server_socket, active_clients, lock):
+DRAIN_TIMEOUT = 5.0        # seconds allowed for flushing all clients
+RECONNECT_SPREAD = 3.0     # reconnect hints are spread over this many seconds
+
+
+def shutdown_server(server_socket, active_clients, drain_timeout=DRAIN_TIMEOUT, reconnect_after=None):
     """
     Gracefully shutdown server and close all connections.
-    
+
     Args:
         server_socket: Server socket object
-        active_clients: Dictionary of active clients
-        lock: Threading lock
-        
+        active_clients: ClientRegistry of connected clients
+        drain_timeout: Seconds allowed to finish in-flight sends and notify clients
+        reconnect_after: If set, clients are told to reconnect after this many
+            seconds (plus jitter, so they don't all come back at once)
+
     Example:
-        shutdown_server(server_socket, active_clients, lock)
+        shutdown_server(server_socket, active_clients)
     """
     log_event("SERVER", "Shutting down server...")
-    
-    # Close all client connections
-    with lock:
-        for username, (client_socket, address) in list(active_clients.items()):
-            try:
-                send_message(client_socket, "SERVER_SHUTDOWN")
-                client_socket.close()
-            except:
-                pass
-        active_clients.clear()
-    
-    # Close server socket
+    deadline = time.monotonic() + drain_timeout
+
+    # Stop accepting first so no new client slips in while draining
     if server_socket:
         try:
             server_socket.close()
-        except:
+        except OSError:
             pass
-    
-    log_event("SERVER", "Server shutdown complete")
 
+    clients = active_clients.clear()
+    for record in clients:
+        client_socket = record.sock
+        # Waiting for the client's send lock lets an in-flight frame finish
+        remaining = deadline - time.monotonic()
+        locked = remaining > 0 and record.send_lock.acquire(timeout=remaining)
+        try:
+            remaining = deadline - time.monotonic()
+            if locked and remaining > 0:
+                client_socket.settimeout(remaining)
+                send_message(client_socket, _shutdown_message(reconnect_after))
+                client_socket.shutdown(socket.SHUT_WR)
+            else:
+                log_event("SERVER", f"Drain timeout for {record.client_id}; closing without notice")
+        except OSError:
+            pass
+        finally:
+            if locked:
+                record.send_lock.release()
+            try:
+                client_socket.close()
+            except OSError:
+                pass
+
+    capture.stop_capture()
+    log_event("SERVER", f"Server shutdown complete ({len(clients)} client(s) notified)")
+
+
+def _shutdown_message(reconnect_after):
+    if reconnect_after is None:
+        return "SERVER_SHUTDOWN"
+    delay = reconnect_after + random.uniform(0, RECONNECT_SPREAD)
+    return f"SERVER_SHUTDOWN:RECONNECT={delay:.1f}"
+
+
+def spawn_replacement(server_socket, encryption_key):
+    """
+    Start a new server process that inherits the listening socket and key.
+    Connections keep being accepted by the new process while this one drains,
+    so a deploy does not refuse anyone or force clients to re-enter the key.
+
+    Returns:
+        subprocess.Popen or None if the handoff failed
+    """
+    fd = server_socket.fileno()
+    env = dict(os.environ)
+    env[LISTEN_FD_ENV] = str(fd)
+    env[ENCRYPTION_KEY_ENV] = encryption_key.decode()
+    try:
+        process = subprocess.Popen([sys.executable] + sys.argv, env=env, pass_fds=(fd,))
+    except Exception as e:
+        log_event("ERROR", f"Hot restart failed: {e}")
+        return None
+    log_event("SERVER", f"Hot restart: listening socket handed to PID {process.pid}")
+    return process
@@ -1,57 +1,141 @@
 """
 CCN Project - Main Server
+
+Signals:
+    Ctrl+C / SIGTERM  drain clients and exit
+    SIGHUP            hot restart: hand the listening socket to a new
+                      process, then drain (clients are told to reconnect)
+
+Options:
+    --capture PATH        record all framed traffic to PATH (see modules/capture.py)
+    --capture-plaintext   also store message plaintext (credentials included!)
+    --no-admin            don't open the admin channel (see modules/admin.py)
 """
 
+import argparse
+import os
+import signal
 import threading
-import time
 from modules.logger import log_event
-from modules.encryption import get_encryption_key
-from modules.server_connection import start_server
+from modules.encryption import get_encryption_key, init_encryption
+from modules.server_connection import create_server_socket, start_server
 from modules.alert_generator import generate_alert
 from modules.broadcaster import broadcast_alert
-from modules.shutdown import shutdown_server
+from modules.shutdown import shutdown_server, spawn_replacement, ENCRYPTION_KEY_ENV, LISTEN_FD_ENV
+from modules import capture
+from modules.client_registry import ClientRegistry
+from modules.admission import AdmissionControl
+from modules.admin import AdminServer, ServerControl
+from modules.alert_history import AlertHistory
 
 HOST = '127.0.0.1'
 PORT = 8888
-MAX_CLIENTS = 10
+MAX_CLIENTS = 10               # max concurrent sessions (logged in + handshaking)
+LISTEN_BACKLOG = 128
+RESTART_RECONNECT_DELAY = 1.0  # seconds before clients reconnect after a hot restart
+ALERT_INTERVAL = 10            # seconds between alerts (tunable at runtime via admin channel)
 
-active_clients = {}
-lock = threading.Lock()
-server_running = True
+active_clients = ClientRegistry()
+admission = AdmissionControl(max_sessions=MAX_CLIENTS)
+control = ServerControl(ALERT_INTERVAL)
+history = AlertHistory()
+admin_server = None
+server_running = threading.Event()
 server_socket = None
+reconnect_after = None
 
 def alert_generator():
-    while server_running:
-        time.sleep(10)
-        if len(active_clients) > 0:
-            alert = generate_alert()
-            broadcast_alert(alert, active_clients, lock)
+    while server_running.is_set():
+        if not control.wait_for_next_alert(server_running):
+            continue
+        if active_clients:
+            try:
+                alert = generate_alert()
+            except Exception as e:
+                # e.g. weather API unreachable; keep the alert thread alive
+                log_event("ERROR", f"Alert generation failed: {e}")
+                continue
+            history.append(alert)
+            broadcast_alert(alert, active_clients)
+
+def request_stop(signum=None, frame=None):
+    server_running.clear()
+
+def request_hot_restart(signum=None, frame=None):
+    global reconnect_after
+    if spawn_replacement(server_socket, get_encryption_key()):
+        reconnect_after = RESTART_RECONNECT_DELAY
+        server_running.clear()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CCN alert server")
+    parser.add_argument("--capture", metavar="PATH", help="record framed traffic to PATH")
+    parser.add_argument("--capture-plaintext", action="store_true",
+                        help="store message plaintext in the capture (contains credentials)")
+    parser.add_argument("--no-admin", action="store_true", help="disable the local admin channel")
+    return parser.parse_args()
+
+def init_server(capture_path=None, capture_plaintext=False, enable_admin=True):
+    """
+    Explicit init phase: encryption key, listening socket, signal handlers,
+    optional traffic capture and admin channel.
+    Importing this module does none of it, so the import itself stays cheap.
+    Returns the encryption key.
+    """
+    global server_socket, admin_server
+
+    if capture_path:
+        # A hot-restarted server must not truncate its predecessor's capture
+        if LISTEN_FD_ENV in os.environ:
+            capture_path = f"{capture_path}.{os.getpid()}"
+        capture.start_capture(capture_path, include_plaintext=capture_plaintext)
+        log_event("SERVER", f"Capturing traffic to {capture_path}"
+                            f"{' (with plaintext)' if capture_plaintext else ''}")
+
+    # A hot-restarted server keeps its predecessor's key so clients don't re-paste it
+    inherited_key = os.environ.pop(ENCRYPTION_KEY_ENV, None)
+    encryption_key = init_encryption(inherited_key.encode() if inherited_key else None)
+    print(f"{'='*50}\nSERVER STARTING...\n{'='*50}")
+    print("Encryption Key (share with clients exactly):")
+    print(f"  As bytes: {repr(encryption_key)}")
+    print(f"  As string: {encryption_key.decode()}")
+    print(f"{'='*50}\n")
+
+    server_socket = create_server_socket(HOST, PORT, LISTEN_BACKLOG)
+    server_running.set()
+    signal.signal(signal.SIGTERM, request_stop)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, request_hot_restart)
+    if enable_admin:
+        admin_server = AdminServer(active_clients, admission, control)
+        admin_server.start()
+    return encryption_key
+
+def stop_server(reconnect=None):
+    server_running.clear()
+    if admin_server:
+        admin_server.close()
+    shutdown_server(server_socket, active_clients, reconnect_after=reconnect)
 
 if __name__ == "__main__":
     try:
-        encryption_key = get_encryption_key()
-        print(f"{'='*50}\nSERVER STARTING...\n{'='*50}")
-        print("Encryption Key (share with clients exactly):")
-        print(f"  As bytes: {repr(encryption_key)}")
-        print(f"  As string: {encryption_key.decode()}")
-        print(f"{'='*50}\n")
-
-        server_socket = start_server(
-            HOST,
-            PORT,
-            MAX_CLIENTS,
+        args = parse_args()
+        encryption_key = init_server(args.capture, args.capture_plaintext, not args.no_admin)
+
+        start_server(
+            server_socket,
             active_clients,
-            lock,
             server_running,
             alert_generator,
-            encryption_key
+            encryption_key,
+            admission,
+            history
         )
+        stop_server(reconnect_after)
 
     except KeyboardInterrupt:
         print("\nServer interrupted by user")
-        server_running = False
-        shutdown_server(server_socket, active_clients, lock)
+        stop_server()
     except Exception as e:
         log_event("ERROR", f"Fatal error: {e}")
-        server_running = False
-        shutdown_server(server_socket, active_clients, lock)
+        stop_server()
@@ -0,0 +1,99 @@
+"""
+AlertHistory.query checked against a naive filter over the alerts that
+should still be in the ring: wraparound, since, min_priority and paging.
+
+Run from the project root:
+    python -m pytest -q
+"""
+
+import json
+import random
+
+import pytest
+
+from modules.alert_history import (AlertHistory, HISTORY_MAX_ITEMS, PRIORITIES, PRIORITY_CODES,
+                                   parse_history_request)
+
+CAPACITY = 16
+
+
+def fill(history, count, rng):
+    """Append count alerts with non-decreasing times (ties included); return the naive log."""
+    log = []
+    at = 1000.0
+    for i in range(count):
+        at += rng.choice((0.0, 0.5, 1.0, 3.0))
+        priority = rng.choice(PRIORITIES)
+        seq = history.append({"priority": priority, "alert_id": i}, at=at)
+        log.append((seq, at, priority))
+    return log
+
+
+def naive(log, capacity, since=None, min_priority="LOW", after=None):
+    """Seqs a query should return, oldest first, ignoring paging."""
+    return [seq for seq, at, priority in log[-capacity:]
+            if (since is None or at >= since)
+            and PRIORITY_CODES[priority] >= PRIORITY_CODES[min_priority]
+            and (after is None or seq > after)]
+
+
+def seqs(items):
+    return [json.loads(item)["seq"] for item in items]
+
+
+def page_all(history, limit, **params):
+    """Follow cursors until the query is exhausted; return every seq seen."""
+    seen, cursor = [], None
+    while True:
+        items, cursor = history.query(after=cursor, limit=limit, **params)
+        seen.extend(seqs(items))
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("count", [0, 5, CAPACITY, CAPACITY + 1, CAPACITY * 3 + 7])
+@pytest.mark.parametrize("min_priority", PRIORITIES)
+def test_query_matches_naive_filter(count, min_priority):
+    rng = random.Random(count)
+    history = AlertHistory(capacity=CAPACITY)
+    log = fill(history, count, rng)
+    assert len(history) == min(count, CAPACITY)
+
+    times = [at for _, at, _ in log]
+    for since in [None, 0.0, 1e9] + rng.sample(times, min(5, len(times))):
+        expected = naive(log, CAPACITY, since, min_priority)
+        items, cursor = history.query(since=since, min_priority=min_priority, limit=CAPACITY * 4)
+        assert seqs(items) == expected
+        assert cursor is None
+
+
+@pytest.mark.parametrize("limit", [1, 3, CAPACITY])
+@pytest.mark.parametrize("min_priority", PRIORITIES)
+def test_paging_returns_every_item_once(limit, min_priority):
+    rng = random.Random(limit)
+    history = AlertHistory(capacity=CAPACITY)
+    log = fill(history, CAPACITY * 2 + 5, rng)
+    since = log[-CAPACITY // 2][1]
+    assert page_all(history, limit, min_priority=min_priority) == naive(log, CAPACITY, None, min_priority)
+    assert page_all(history, limit, since=since, min_priority=min_priority) == \
+        naive(log, CAPACITY, since, min_priority)
+
+
+def test_cursor_from_overwritten_items_resumes_at_oldest():
+    rng = random.Random(1)
+    history = AlertHistory(capacity=CAPACITY)
+    log = fill(history, CAPACITY, rng)
+    _, cursor = history.query(limit=2)
+    log += fill(history, CAPACITY, rng)  # cursor now points before the ring
+    items, _ = history.query(after=cursor, limit=CAPACITY * 2)
+    assert seqs(items) == naive(log, CAPACITY)
+
+
+def test_parse_history_request():
+    assert parse_history_request("HISTORY:") == {}
+    assert parse_history_request("HISTORY:since=12.5;priority=high;limit=9999;after=3") == {
+        "since": 12.5, "min_priority": "HIGH", "limit": HISTORY_MAX_ITEMS, "after": 3,
+    }
+    for bad in ("HISTORY:priority=URGENT", "HISTORY:limit=x", "HISTORY:colour=red"):
+        with pytest.raises(ValueError):
+            parse_history_request(bad)
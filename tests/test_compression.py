@@ -0,0 +1,102 @@
+"""
+Round trips for the compressed framing: flag byte, batch pack/unpack,
+the per-socket pending queue, and the decompression size limit.
+
+Run from the project root:
+    python -m pytest -q
+"""
+
+import socket
+import zlib
+
+import pytest
+
+from modules import compression, encryption
+from modules.message_handler import send_message, send_batch, receive_message
+
+CODECS = compression.available_codecs()
+ALERT = ('ALERT:{"priority": "HIGH", "message": "Weather Alert: Temp: 31.5°C, '
+         'Humidity: 82%, Condition: Clouds", "timestamp": "2026-10-19 12:00:00", "alert_id": 1760000000}')
+
+
+@pytest.fixture(scope="module", autouse=True)
+def cipher():
+    encryption.init_encryption()
+
+
+@pytest.fixture
+def pair():
+    a, b = socket.socketpair()
+    yield a, b
+    a.close()
+    b.close()
+
+
+@pytest.mark.parametrize("codec", CODECS)
+@pytest.mark.parametrize("batch", [False, True])
+def test_payload_round_trip_sets_flags(codec, batch):
+    data = ALERT.encode()
+    payload = compression.encode_payload(codec, data, batch=batch)
+    assert payload[0] & compression.FLAG_COMPRESSED
+    assert bool(payload[0] & compression.FLAG_BATCH) == batch
+    assert compression.decode_payload(codec, payload) == (batch, data)
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_short_payload_is_sent_raw(codec):
+    data = b"HEARTBEAT"
+    payload = compression.encode_payload(codec, data)
+    assert payload == bytes([0]) + data
+    assert compression.decode_payload(codec, payload) == (False, data)
+
+
+def test_batch_pack_unpack():
+    messages = [ALERT, "", "HEARTBEAT_OK", "café ☃"]
+    assert compression.unpack_batch(compression.pack_batch(messages)) == messages
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_batch_frame_fills_pending_queue(pair, codec):
+    sender, receiver = pair
+    compression.set_codec(sender, codec)
+    compression.set_codec(receiver, codec)
+    messages = [f"HISTORY_ITEM:{ALERT}{i}" for i in range(5)]
+
+    assert send_batch(sender, messages)
+    assert send_message(sender, "HISTORY_END:5:")
+
+    assert receive_message(receiver) == messages[0]
+    assert list(compression.get_state(receiver).pending) == messages[1:]
+    received = [receive_message(receiver) for _ in range(5)]
+    assert received == messages[1:] + ["HISTORY_END:5:"]
+    assert not compression.get_state(receiver).pending
+
+
+@pytest.mark.parametrize("codec", [compression.CODEC_ZLIB, compression.CODEC_ZLIB_DICT])
+def test_decompression_bomb_is_refused(codec):
+    bomb = b"\0" * (compression.MAX_PLAINTEXT_SIZE + 1)
+    payload = bytes([compression.FLAG_COMPRESSED]) + compression._compress(codec, bomb)
+    assert len(payload) < 2048
+    with pytest.raises(ValueError):
+        compression.decode_payload(codec, payload)
+
+
+def test_largest_allowed_payload_decompresses():
+    data = b"\0" * compression.MAX_PLAINTEXT_SIZE
+    payload = compression.encode_payload(compression.CODEC_ZLIB, data)
+    assert compression.decode_payload(compression.CODEC_ZLIB, payload) == (False, data)
+
+
+def test_truncated_payload_is_refused():
+    payload = compression.encode_payload(compression.CODEC_ZLIB, ALERT.encode())
+    with pytest.raises(ValueError):
+        compression.decode_payload(compression.CODEC_ZLIB, payload[:-4])
+
+
+def test_bomb_frame_drops_connection(pair):
+    sender, receiver = pair
+    compression.set_codec(receiver, compression.CODEC_ZLIB)
+    bomb = zlib.compress(b"\0" * (compression.MAX_PLAINTEXT_SIZE * 4))
+    data = encryption.encrypt_bytes(bytes([compression.FLAG_COMPRESSED]) + bomb)
+    sender.sendall(len(data).to_bytes(4, 'big') + data)
+    assert receive_message(receiver) is None